@@ -0,0 +1,90 @@
+"""
+Throughput of batched multi-query search vs. N sequential single-query calls.
+
+    python -m benchmarks.batch_search_benchmark --docs 100000 --batch-sizes 1,8,32,128
+    python -m benchmarks.batch_search_benchmark --docs 5000 --embedding-model sentence-transformers/all-MiniLM-L6-v2
+
+For each batch size the same queries are answered twice: once with
+similarity_search_with_scores per query (embedding + search each time) and
+once with similarity_search_batch (one embedding pass, one matrix search).
+Both end-to-end and search-only (precomputed vectors) throughput are reported.
+"""
+from benchmarks.common import HashingEmbeddings, environment_info
+from benchmarks.synthetic_corpus import generate_corpus, generate_queries
+from src.vector_store import VectorStoreManager
+import argparse
+import json
+import time
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def measure(manager, queries, vectors, batch_size: int, k: int) -> dict:
+    batches = [range(i, min(i + batch_size, len(queries))) for i in range(0, len(queries), batch_size)]
+
+    def sequential(with_vectors: bool):
+        for batch in batches:
+            for i in batch:
+                manager.similarity_search_with_scores(
+                    queries[i], k=k, query_vector=vectors[i] if with_vectors else None)
+
+    def batched(with_vectors: bool):
+        for batch in batches:
+            manager.similarity_search_batch(
+                [queries[i] for i in batch], k=k,
+                query_vectors=[vectors[i] for i in batch] if with_vectors else None)
+
+    n = len(queries)
+    result = {'batch_size': batch_size}
+    for label, with_vectors in (('end_to_end', False), ('search_only', True)):
+        seq_qps = n / timed(lambda: sequential(with_vectors))
+        batch_qps = n / timed(lambda: batched(with_vectors))
+        result[label] = {
+            'sequential_qps': round(seq_qps, 1),
+            'batched_qps': round(batch_qps, 1),
+            'speedup': round(batch_qps / seq_qps, 2),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched vs. sequential search benchmark")
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=512)
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the hashing embeddings")
+    parser.add_argument("--embedding-model", default=None, help="Use a real HuggingFace model instead of hashing")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.docs, seed=args.seed)
+    queries = [q for q, _ in generate_queries(corpus, args.queries, seed=args.seed + 1)]
+
+    embeddings = None if args.embedding_model else HashingEmbeddings(dim=args.dim)
+    manager = VectorStoreManager(args.embedding_model or f"hashing-{args.dim}", embeddings=embeddings)
+    manager.create_vector_store(corpus)
+    vectors = manager.embed_queries(queries)
+
+    rows = []
+    print(f"\n{'batch':>6}{'seq QPS':>10}{'batch QPS':>11}{'speedup':>9}{'search-only speedup':>21}")
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        row = measure(manager, queries, vectors, batch_size, args.k)
+        rows.append(row)
+        e2e = row['end_to_end']
+        print(f"{batch_size:>6}{e2e['sequential_qps']:>10}{e2e['batched_qps']:>11}{e2e['speedup']:>9}"
+              f"{row['search_only']['speedup']:>21}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'environment': environment_info(), 'params': vars(args), 'results': rows}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
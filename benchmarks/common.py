@@ -0,0 +1,121 @@
+"""Shared helpers for the benchmark scripts (run them from the repo root with `python -m benchmarks.<name>`)."""
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import BaseLLM
+from langchain_core.outputs import Generation, LLMResult
+from typing import List, Dict, Optional
+import numpy as np
+import subprocess
+import platform
+import resource
+import hashlib
+import time
+import re
+import os
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic, model-free embeddings (signed feature hashing of tokens).
+    Lets index/search benchmarks run at 1M documents without a GPU; use a
+    real EMBEDDING_MODEL when measuring embedding cost or retrieval quality.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = int(hashlib.blake2b(token.encode(), digest_size=8).hexdigest(), 16)
+            vector[digest % self.dim] += 1.0 if (digest >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+
+class StubLLM(BaseLLM):
+    """
+    Deterministic stand-in for Ollama: echoes the start of the prompt context
+    and reports Ollama-style token counts. `latency_ms` simulates generation time.
+    """
+
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, prompts: List[str], stop=None, run_manager=None, **kwargs) -> LLMResult:
+        generations = []
+        for prompt in prompts:
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000)
+            context = prompt.split("Context:", 1)[-1]
+            digest = hashlib.sha1(prompt.encode()).hexdigest()[:8]
+            text = f"[stub {digest}] " + " ".join(context.split()[:40])
+            generations.append([Generation(
+                text=text,
+                generation_info={
+                    'prompt_eval_count': len(prompt.split()),
+                    'eval_count': len(text.split())
+                }
+            )])
+        return LLMResult(generations=generations)
+
+
+def latency_summary(samples_seconds: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean in milliseconds plus throughput for sequential samples"""
+    if not samples_seconds:
+        return {}
+    values = np.asarray(samples_seconds) * 1000
+    total = float(np.sum(samples_seconds))
+    return {
+        'count': len(samples_seconds),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'throughput_per_s': round(len(samples_seconds) / total, 2) if total else None,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def directory_size_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return round(total / (1024 * 1024), 3)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def environment_info() -> Dict:
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
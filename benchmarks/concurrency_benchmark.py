@@ -0,0 +1,121 @@
+"""
+Multithreaded search stress test: QPS and latency as request threads scale.
+
+    python -m benchmarks.concurrency_benchmark --docs 100000 --threads 1,2,4,8,16
+    python -m benchmarks.concurrency_benchmark --docs 50000 --omp-threads 0 --with-writes
+
+Each thread issues searches through VectorStoreManager.similarity_search_with_scores
+with precomputed query vectors (so only the FAISS path is measured) for
+--seconds. FAISS releases the GIL, so QPS should grow with threads until the
+cores are busy; --omp-threads sets FAISS's per-search OpenMP threads (1 avoids
+oversubscription under concurrency, 0 = all cores per search). --with-writes
+runs IndexSyncWorker-style apply_changes in parallel to exercise the
+in-place index updates and the read/write lock under load.
+"""
+from benchmarks.common import HashingEmbeddings, latency_summary, environment_info
+from benchmarks.synthetic_corpus import generate_corpus, generate_queries
+from src.vector_store import VectorStoreManager
+import threading
+import argparse
+import random
+import json
+import time
+
+
+def run_threads(manager, query_vectors, n_threads: int, seconds: float, k: int) -> dict:
+    deadline = time.perf_counter() + seconds
+    samples = [[] for _ in range(n_threads)]
+    errors = []
+
+    def worker(slot: int):
+        rng = random.Random(slot)
+        try:
+            while time.perf_counter() < deadline:
+                vector = query_vectors[rng.randrange(len(query_vectors))]
+                start = time.perf_counter()
+                manager.similarity_search_with_scores("", k=k, query_vector=vector)
+                samples[slot].append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_samples = [s for per_thread in samples for s in per_thread]
+    summary = latency_summary(all_samples)
+    summary.pop('throughput_per_s', None)
+    return {
+        'threads': n_threads,
+        'queries': len(all_samples),
+        'qps': round(len(all_samples) / elapsed, 1),
+        'latency': summary,
+        'errors': errors[:5],
+    }
+
+
+def writer_loop(manager, corpus, stop: threading.Event, stats: dict) -> None:
+    """Re-upsert and delete random documents continuously, like the sync worker"""
+    rng = random.Random(0)
+    while not stop.is_set():
+        batch = [dict(doc) for doc in rng.sample(corpus, 20)]
+        manager.apply_changes(batch, [])
+        stats['upserts'] += len(batch)
+        manager.compact(min_dead_ratio=0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent search stress benchmark")
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--threads", default="1,2,4,8,16")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per thread count")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--omp-threads", type=int, default=1, help="FAISS OpenMP threads per search (0 = all cores)")
+    parser.add_argument("--with-writes", action="store_true", help="Apply index updates concurrently")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.docs, seed=args.seed)
+    manager = VectorStoreManager(f"hashing-{args.dim}", embeddings=HashingEmbeddings(dim=args.dim))
+    manager.create_vector_store(corpus)
+    manager.search_threads = args.omp_threads
+    query_vectors = [manager.embed_query(q) for q, _ in generate_queries(corpus, args.queries, seed=args.seed + 1)]
+
+    stop = threading.Event()
+    write_stats = {'upserts': 0}
+    writer = None
+    if args.with_writes:
+        writer = threading.Thread(target=writer_loop, args=(manager, corpus, stop, write_stats), daemon=True)
+        writer.start()
+
+    rows = []
+    print(f"\n{'threads':>8}{'QPS':>10}{'speedup':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for n_threads in [int(t) for t in args.threads.split(",")]:
+        row = run_threads(manager, query_vectors, n_threads, args.seconds, args.k)
+        row['speedup'] = round(row['qps'] / rows[0]['qps'], 2) if rows else 1.0
+        rows.append(row)
+        print(f"{n_threads:>8}{row['qps']:>10}{row['speedup']:>9}"
+              f"{row['latency']['p50_ms']:>9}{row['latency']['p99_ms']:>9}"
+              + (f"  errors: {row['errors']}" if row['errors'] else ""))
+
+    stop.set()
+    if writer:
+        writer.join()
+        print(f"\nConcurrent writes: {write_stats['upserts']} upserts, final dead ratio {manager.dead_ratio():.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'environment': environment_info(), 'params': vars(args),
+                       'results': rows, 'writes': write_stats}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
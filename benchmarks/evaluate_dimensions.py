@@ -0,0 +1,115 @@
+"""
+Memory, search time and recall at reduced embedding dimensions.
+
+    python -m benchmarks.evaluate_dimensions --synthetic 20000 --dims 256,128,64
+    python -m benchmarks.evaluate_dimensions --synthetic 5000 --embedding-model sentence-transformers/all-MiniLM-L6-v2
+
+The corpus is embedded once at full size; each (method, dim) pair is then
+built with the same DimensionReducer the index uses (EMBEDDING_REDUCTION /
+EMBEDDING_DIM). Reported per pair:
+  index_mb         raw vector memory of the flat index
+  search           per-query FAISS latency (query reduction included)
+  overlap@k        share of the full-dimension top-k that is still returned
+  recall@k         share of queries whose source document is in the top-k
+"""
+from benchmarks.common import HashingEmbeddings, latency_summary, environment_info
+from benchmarks.synthetic_corpus import generate_corpus, generate_queries
+from src.dim_reduction import DimensionReducer
+from src.vector_store import doc_key
+import numpy as np
+import argparse
+import faiss
+import json
+import time
+
+
+def load_embeddings(args):
+    if not args.embedding_model:
+        return HashingEmbeddings(dim=args.dim)
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=args.embedding_model, encode_kwargs={"normalize_embeddings": True})
+
+
+def search_all(index: faiss.Index, queries: np.ndarray, k: int, transform=None):
+    samples, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        vector = transform(query[None, :]) if transform else query[None, :]
+        _, positions = index.search(vector, k)
+        samples.append(time.perf_counter() - start)
+        results.append(positions[0])
+    return results, samples
+
+
+def evaluate_config(method: str, dim: int, corpus_vectors, query_vectors, expected, baseline, k: int) -> dict:
+    reducer = None
+    vectors = corpus_vectors
+    if method != 'full':
+        reducer = DimensionReducer(method, dim)
+        reducer.fit(corpus_vectors)
+        vectors = reducer.transform(corpus_vectors)
+
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    results, samples = search_all(index, query_vectors, k, reducer.transform if reducer else None)
+
+    overlap = np.mean([len(set(r) & set(b)) / k for r, b in zip(results, baseline)])
+    recall = np.mean([target in r for r, target in zip(results, expected)])
+    return {
+        'method': method,
+        'dim': int(vectors.shape[1]),
+        'index_mb': round(vectors.nbytes / (1024 * 1024), 2),
+        'search': latency_summary(samples),
+        'overlap_at_k': round(float(overlap), 4),
+        'recall_at_k': round(float(recall), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate PCA / Matryoshka dimensionality reduction")
+    parser.add_argument("--synthetic", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the hashing embeddings")
+    parser.add_argument("--embedding-model", default=None, help="Use a real HuggingFace model instead of hashing")
+    parser.add_argument("--dims", default="256,128,64", help="Comma-separated target dimensions")
+    parser.add_argument("--methods", default="pca,truncate")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.synthetic, seed=args.seed)
+    queries = generate_queries(corpus, args.queries, seed=args.seed + 1)
+    embeddings = load_embeddings(args)
+
+    print(f"Embedding {len(corpus)} documents and {len(queries)} queries...")
+    corpus_vectors = np.asarray(embeddings.embed_documents([doc['text'] for doc in corpus]), dtype=np.float32)
+    query_vectors = np.asarray([embeddings.embed_query(q) for q, _ in queries], dtype=np.float32)
+    row = {doc_key(doc): i for i, doc in enumerate(corpus)}
+    expected = [row[key] for _, key in queries]
+
+    full_index = faiss.IndexFlatL2(corpus_vectors.shape[1])
+    full_index.add(corpus_vectors)
+    baseline, _ = search_all(full_index, query_vectors, args.k)
+
+    configs = [('full', corpus_vectors.shape[1])]
+    for method in args.methods.split(","):
+        configs += [(method, int(dim)) for dim in args.dims.split(",") if int(dim) < corpus_vectors.shape[1]]
+
+    rows = []
+    print(f"\n{'method':<10}{'dim':>6}{'index MB':>10}{'p50 ms':>9}{'p95 ms':>9}{'overlap@k':>11}{'recall@k':>10}")
+    for method, dim in configs:
+        result = evaluate_config(method, dim, corpus_vectors, query_vectors, expected, baseline, args.k)
+        rows.append(result)
+        print(f"{result['method']:<10}{result['dim']:>6}{result['index_mb']:>10}"
+              f"{result['search']['p50_ms']:>9}{result['search']['p95_ms']:>9}"
+              f"{result['overlap_at_k']:>11}{result['recall_at_k']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'environment': environment_info(), 'params': vars(args), 'results': rows}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Retrieval quality + latency evaluation against a golden question set.
+
+    # Persisted vector_db/ + MySQL, golden set with knowledgebase/project ids
+    python -m benchmarks.evaluate_retrieval --golden benchmarks/golden_questions.json --k 3,5,10
+
+    # Offline: synthetic corpus, golden set generated from it
+    python -m benchmarks.evaluate_retrieval --synthetic 20000 --k 5,10 --hybrid-alpha 0.5,0.7
+
+Every combination of --k / --nprobe / --ef-search / --hybrid-alpha is one
+configuration. The report lists recall@k, MRR, nDCG@k and per-query latency
+for each, and marks the Pareto front of quality (nDCG) vs. p95 latency.
+"""
+from benchmarks.common import HashingEmbeddings, latency_summary, environment_info
+from benchmarks.synthetic_corpus import generate_corpus, generate_queries
+from src.vector_store import VectorStoreManager, doc_key
+from src.retriever import AdvancedRetriever
+from typing import List, Dict
+import itertools
+import argparse
+import json
+import math
+import time
+import os
+
+
+def recall_at_k(retrieved: List[str], expected: List[str]) -> float:
+    return len(set(retrieved) & set(expected)) / len(expected)
+
+
+def reciprocal_rank(retrieved: List[str], expected: List[str]) -> float:
+    for rank, key in enumerate(retrieved, 1):
+        if key in expected:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(retrieved: List[str], expected: List[str]) -> float:
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, key in enumerate(retrieved, 1) if key in expected)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(expected), len(retrieved)) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def evaluate(retriever: AdvancedRetriever, golden: List[Dict], k: int) -> Dict:
+    recalls, rrs, ndcgs, latencies = [], [], [], []
+    for item in golden:
+        start = time.perf_counter()
+        context = retriever.retrieve_context(item['question'], k=k)
+        latencies.append(time.perf_counter() - start)
+
+        retrieved = [doc_key(doc.metadata) for doc in context['all_docs']][:k]
+        recalls.append(recall_at_k(retrieved, item['expected']))
+        rrs.append(reciprocal_rank(retrieved, item['expected']))
+        ndcgs.append(ndcg_at_k(retrieved, item['expected']))
+
+    n = len(golden)
+    return {
+        'recall': round(sum(recalls) / n, 4),
+        'mrr': round(sum(rrs) / n, 4),
+        'ndcg': round(sum(ndcgs) / n, 4),
+        'latency': latency_summary(latencies),
+    }
+
+
+def pareto_front(rows: List[Dict]) -> None:
+    """Flag configurations not beaten on both nDCG (higher) and p95 latency (lower)"""
+    for row in rows:
+        row['pareto'] = not any(
+            other['ndcg'] >= row['ndcg'] and other['latency']['p95_ms'] <= row['latency']['p95_ms']
+            and (other['ndcg'] > row['ndcg'] or other['latency']['p95_ms'] < row['latency']['p95_ms'])
+            for other in rows
+        )
+
+
+def build_retriever(args):
+    if args.synthetic:
+        corpus = generate_corpus(args.synthetic, seed=args.seed)
+        golden = [{'question': q, 'expected': [key]}
+                  for q, key in generate_queries(corpus, args.queries, seed=args.seed + 1)]
+        embeddings = None if args.embedding_model else HashingEmbeddings()
+        manager = VectorStoreManager(args.embedding_model or "hashing-384", embeddings=embeddings)
+        manager.create_vector_store(corpus)
+        return AdvancedRetriever(manager, db_config=None, mode=args.mode), golden
+
+    from config.database import DatabaseConfig
+    with open(args.golden) as f:
+        golden = json.load(f)
+    manager = VectorStoreManager(args.embedding_model or os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'))
+    if not manager.load_vector_store():
+        raise SystemExit("No vector store found; run `python main.py --reload` first")
+    return AdvancedRetriever(manager, DatabaseConfig(), mode=args.mode), golden
+
+
+def _floats(value: str) -> List:
+    return [float(v) for v in value.split(",")] if value else [None]
+
+
+def _ints(value: str) -> List:
+    return [int(v) for v in value.split(",")] if value else [None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality vs. latency")
+    parser.add_argument("--golden", default="benchmarks/golden_questions.json")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use a synthetic corpus of this size instead of MySQL")
+    parser.add_argument("--queries", type=int, default=200, help="Golden questions to generate in --synthetic mode")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--embedding-model", default=None)
+    parser.add_argument("--mode", default=os.getenv('RETRIEVAL_MODE', 'dense'), choices=['dense', 'fulltext'])
+    parser.add_argument("--k", default="5", help="Comma-separated k values")
+    parser.add_argument("--nprobe", default="", help="Comma-separated IVF nprobe values")
+    parser.add_argument("--ef-search", default="", help="Comma-separated HNSW efSearch values")
+    parser.add_argument("--hybrid-alpha", default="", help="Comma-separated dense weights for fulltext mode")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    retriever, golden = build_retriever(args)
+    print(f"✓ {len(golden)} golden questions")
+
+    rows = []
+    for k, nprobe, ef_search, alpha in itertools.product(
+            _ints(args.k), _ints(args.nprobe), _ints(args.ef_search), _floats(args.hybrid_alpha)):
+        config = {'k': k, 'nprobe': nprobe, 'efSearch': ef_search, 'hybrid_alpha': alpha}
+
+        params = {name: value for name, value in (('nprobe', nprobe), ('efSearch', ef_search)) if value is not None}
+        if params:
+            applied = retriever.vector_store.set_search_params(**params)
+            if not all(applied.values()):
+                print(f"  (index ignores {[n for n, ok in applied.items() if not ok]})")
+        if alpha is not None:
+            retriever.hybrid_alpha = alpha
+
+        result = evaluate(retriever, golden, k)
+        rows.append({**config, **result})
+        print(f"  {config} -> recall@k={result['recall']} mrr={result['mrr']} "
+              f"ndcg@k={result['ndcg']} p95={result['latency']['p95_ms']}ms")
+
+    pareto_front(rows)
+
+    print("\nPareto front (nDCG vs. p95 latency):")
+    print(f"{'k':>4} {'nprobe':>7} {'efSearch':>9} {'alpha':>6} {'recall':>7} {'MRR':>6} {'nDCG':>6} {'p95 ms':>8}")
+    for row in sorted(rows, key=lambda r: r['latency']['p95_ms']):
+        if row['pareto']:
+            print(f"{row['k']:>4} {str(row['nprobe']):>7} {str(row['efSearch']):>9} {str(row['hybrid_alpha']):>6} "
+                  f"{row['recall']:>7} {row['mrr']:>6} {row['ndcg']:>6} {row['latency']['p95_ms']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'environment': environment_info(), 'params': vars(args), 'results': rows}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Reproducible retrieval + end-to-end benchmark.
+
+    python -m benchmarks.run_benchmark --sizes 10000,100000 --queries 200 --output bench.json
+    python -m benchmarks.run_benchmark --sizes 1000 --embedding-model sentence-transformers/all-MiniLM-L6-v2
+
+By default documents are embedded with HashingEmbeddings so large corpora
+build quickly; pass --embedding-model to benchmark a real model instead.
+Answering uses the deterministic StubLLM, so results compare commits, not Ollama.
+peak_rss_mb is the process high-water mark; run one size per process to isolate it.
+"""
+from benchmarks.common import (
+    HashingEmbeddings, StubLLM, latency_summary, peak_rss_mb, directory_size_mb, environment_info
+)
+from benchmarks.synthetic_corpus import generate_corpus, generate_queries
+from src.vector_store import VectorStoreManager
+from src.retriever import AdvancedRetriever
+from src.chatbot import SupportChatbot
+import argparse
+import tempfile
+import json
+import time
+
+
+def benchmark_size(n_docs: int, args) -> dict:
+    print(f"\n=== {n_docs} documents ===")
+    corpus = generate_corpus(n_docs, seed=args.seed)
+    queries = [question for question, _ in generate_queries(corpus, args.queries, seed=args.seed + 1)]
+
+    embeddings = None if args.embedding_model else HashingEmbeddings(dim=args.dim)
+    manager = VectorStoreManager(args.embedding_model or f"hashing-{args.dim}", embeddings=embeddings)
+
+    start = time.perf_counter()
+    manager.create_vector_store(corpus)
+    build_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager.persist_directory = tmp
+        manager.save_vector_store()
+        index_size = directory_size_mb(tmp)
+
+    store = manager.vector_store
+    embed_samples, search_samples = [], []
+    for question in queries:
+        t0 = time.perf_counter()
+        vector = manager.embeddings.embed_query(question)
+        t1 = time.perf_counter()
+        store.similarity_search_by_vector(vector, k=args.k)
+        t2 = time.perf_counter()
+        embed_samples.append(t1 - t0)
+        search_samples.append(t2 - t1)
+
+    retriever = AdvancedRetriever(manager, db_config=None)
+    chatbot = SupportChatbot(retriever, "stub", llm=StubLLM(latency_ms=args.llm_latency_ms))
+    answer_samples = []
+    for question in queries:
+        t0 = time.perf_counter()
+        chatbot.answer_question(question)
+        answer_samples.append(time.perf_counter() - t0)
+
+    return {
+        'documents': n_docs,
+        'build': {
+            'seconds': round(build_seconds, 3),
+            'docs_per_s': round(n_docs / build_seconds, 1),
+        },
+        'index_size_mb': index_size,
+        'query_embedding': latency_summary(embed_samples),
+        'search': latency_summary(search_samples),
+        'answer_end_to_end': latency_summary(answer_samples),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval and answering benchmark")
+    parser.add_argument("--sizes", default="10000", help="Comma-separated corpus sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the hashing embeddings")
+    parser.add_argument("--embedding-model", default=None, help="Use a real HuggingFace model instead of hashing")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated stub LLM latency")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = {
+        'environment': environment_info(),
+        'params': vars(args),
+        'runs': [benchmark_size(int(size), args) for size in args.sizes.split(",")],
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"\n✓ Results written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Seeded generator of knowledgebase/project documents shaped like DataLoader output."""
+from typing import List, Dict, Tuple
+from src.data_loader import DataLoader
+import random
+
+
+PRODUCTS = ['Milagro', 'Utiliko', 'Vivant']
+
+TOPICS = {
+    'Milagro': ['offer engine', 'kiosk', 'loyalty points', 'gift card', 'POS refund', 'campaign',
+                'push notification', 'menu update', 'webhook', 'guest segmentation'],
+    'Utiliko': ['CRM pipeline', 'timesheet', 'API token', 'invoice', 'SLA escalation',
+                'project template', 'payroll sync', 'contract review', 'lead scoring', 'audit log'],
+    'Vivant': ['sensor calibration', 'firmware upgrade', 'alert escalation', 'edge gateway', 'HVAC schedule',
+               'fleet tracking', 'energy dashboard', 'MQTT broker', 'parking occupancy', 'device provisioning'],
+}
+
+ACTIONS = ['configure', 'troubleshoot', 'reset', 'enable', 'audit', 'migrate', 'monitor', 'approve']
+ISSUES = ['timeouts', 'sync failures', 'duplicate records', 'permission errors', 'stale data',
+          'throttling', 'missing entries', 'misconfigured rules']
+TECH = ['Python', 'Django', 'FastAPI', 'React', 'Vue.js', 'Node.js', 'Go', 'PostgreSQL', 'MongoDB',
+        'Redis', 'MQTT', 'Kubernetes', 'Docker', 'TensorFlow', 'Celery', 'Kafka']
+CATEGORIES = ['docs', 'faq', 'sop']
+STATUSES = ['active', 'completed', 'on-hold']
+
+
+def _kb_row(rng: random.Random, doc_id: int) -> tuple:
+    product = rng.choice(PRODUCTS)
+    topic = rng.choice(TOPICS[product])
+    action = rng.choice(ACTIONS)
+    issue = rng.choice(ISSUES)
+    category = rng.choice(CATEGORIES)
+    title = f"{product} {topic.title()} {action.title()} Guide {doc_id}"
+    content = (
+        f"To {action} the {product} {topic}, open the admin console and review the {topic} settings. "
+        f"Common causes of {issue} include expired credentials, network drops and incorrect mappings. "
+        f"Check the {topic} logs, apply the recommended fix and verify the change with a test transaction. "
+        f"Escalate to support if {issue} persist after {rng.randint(2, 48)} hours."
+    )
+    tags = ",".join([product.lower(), topic.split()[0].lower(), issue.split()[0]])
+    return (doc_id, title, content, category, tags, "2025-01-01")
+
+
+def _project_row(rng: random.Random, doc_id: int) -> tuple:
+    product = rng.choice(PRODUCTS)
+    topic = rng.choice(TOPICS[product])
+    name = f"{product} {topic.title()} Platform {doc_id}"
+    description = (
+        f"Builds a {topic} service for {product} customers with real-time analytics, "
+        f"automated alerts and role-based access."
+    )
+    tech_stack = ", ".join(rng.sample(TECH, 4))
+    start_date = f"{rng.choice([2023, 2024, 2025])}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    return (doc_id, name, description, tech_stack, rng.choice(STATUSES), start_date, '{}')
+
+
+def generate_corpus(n_docs: int, seed: int = 42, project_ratio: float = 0.2) -> List[Dict]:
+    """Return `n_docs` DataLoader-style dicts (knowledgebase + projects)"""
+    rng = random.Random(seed)
+    n_projects = int(n_docs * project_ratio)
+    docs = [DataLoader.knowledgebase_row_to_doc(_kb_row(rng, i + 1)) for i in range(n_docs - n_projects)]
+    docs += [DataLoader.project_row_to_doc(_project_row(rng, i + 1)) for i in range(n_projects)]
+    return docs
+
+
+def generate_queries(corpus: List[Dict], n_queries: int, seed: int = 7) -> List[Tuple[str, str]]:
+    """Questions paraphrasing random corpus documents, paired with the source key"""
+    rng = random.Random(seed)
+    queries = []
+    for doc in rng.sample(corpus, min(n_queries, len(corpus))):
+        key = f"{doc['source']}:{doc['id']}"
+        if doc['source'] == 'knowledgebase':
+            words = doc['title'].split()
+            question = f"How do I {words[-3].lower()} {' '.join(words[:-3])}?"
+        else:
+            question = f"What does the {doc['project_name']} project do?"
+        queries.append((question, key))
+    return queries
@@ -34,7 +34,9 @@ def create_tables():
             tags VARCHAR(255),
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            INDEX idx_category (category)
+            INDEX idx_category (category),
+            INDEX idx_updated_at (updated_at),
+            FULLTEXT INDEX ft_knowledgebase (title, content, tags)
         )
         """,
         """
@@ -46,7 +48,12 @@ def create_tables():
             status ENUM('active', 'completed', 'on-hold') DEFAULT 'active',
             start_date DATE,
             metadata JSON,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_status (status),
+            INDEX idx_start_date (start_date),
+            INDEX idx_updated_at (updated_at),
+            FULLTEXT INDEX ft_projects (project_name, description, tech_stack)
         )
         """
     ]
@@ -56,6 +63,67 @@ def create_tables():
             conn.execute(text(table_sql))
             conn.commit()
 
+    # Tables created by older versions of this script miss the newer columns/indexes
+    create_columns()
+    create_indexes()
+
+
+# (table, column name, DDL) - applied only when the column is missing
+COLUMNS = [
+    ("projects", "updated_at",
+     "ALTER TABLE projects ADD COLUMN updated_at TIMESTAMP "
+     "DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
+]
+
+def create_columns():
+    """Add any missing columns to existing tables"""
+    with engine.connect() as conn:
+        for table_name, column_name, column_sql in COLUMNS:
+            exists = conn.execute(
+                text("""
+                    SELECT COUNT(*) FROM information_schema.columns
+                    WHERE table_schema = DATABASE()
+                      AND table_name = :table_name
+                      AND column_name = :column_name
+                """),
+                {"table_name": table_name, "column_name": column_name}
+            ).scalar()
+
+            if not exists:
+                conn.execute(text(column_sql))
+                conn.commit()
+
+
+# (table, index name, DDL) - applied only when the index is missing
+INDEXES = [
+    ("projects", "idx_status", "CREATE INDEX idx_status ON projects (status)"),
+    ("projects", "idx_start_date", "CREATE INDEX idx_start_date ON projects (start_date)"),
+    ("knowledgebase", "idx_updated_at", "CREATE INDEX idx_updated_at ON knowledgebase (updated_at)"),
+    ("projects", "idx_updated_at", "CREATE INDEX idx_updated_at ON projects (updated_at)"),
+    ("knowledgebase", "ft_knowledgebase",
+     "CREATE FULLTEXT INDEX ft_knowledgebase ON knowledgebase (title, content, tags)"),
+    ("projects", "ft_projects",
+     "CREATE FULLTEXT INDEX ft_projects ON projects (project_name, description, tech_stack)"),
+]
+
+def create_indexes():
+    """Add any missing secondary indexes to existing tables"""
+    with engine.connect() as conn:
+        for table_name, index_name, index_sql in INDEXES:
+            exists = conn.execute(
+                text("""
+                    SELECT COUNT(*) FROM information_schema.statistics
+                    WHERE table_schema = DATABASE()
+                      AND table_name = :table_name
+                      AND index_name = :index_name
+                """),
+                {"table_name": table_name, "index_name": index_name}
+            ).scalar()
+
+            if not exists:
+                conn.execute(text(index_sql))
+                conn.commit()
+
 def insert_sample_data():
     """Insert sample data (ONLY knowledge base + projects)"""
     
@@ -1,10 +1,25 @@
 import os
+import sys
+import atexit
+import signal
 from dotenv import load_dotenv
 from config.database import DatabaseConfig
 from src.data_loader import DataLoader
 from src.vector_store import VectorStoreManager
+from src.dim_reduction import DimensionReducer
 from src.retriever import AdvancedRetriever   
+from src.reranker import CrossEncoderReranker
 from src.chatbot import SupportChatbot
+from src.session_store import SessionStore
+from src.llm_pool import LLMBackendPool, OllamaEndpoint
+from src.model_router import ModelRouter
+from src.extractive import SentenceIndex, ExtractiveAnswerer
+from src.precomputed import PrecomputedAnswers
+from src.query_log import QueryLog
+from src.dedup import NearDuplicateDetector
+from src.query_router import SemanticRouter
+from src.query_expansion import QueryExpander
+from src.index_sync import IndexSyncWorker, SnapshotWatcher, to_db_timestamp
 
 def initialize_system(force_reload=False):
     """Initialize all system components"""
@@ -22,28 +37,183 @@ def initialize_system(force_reload=False):
     
     # 2. Vector store (KB + Projects only)
     embedding_model = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
-    vector_store = VectorStoreManager(embedding_model)
+    # Optional PCA / Matryoshka truncation of every embedding (see benchmarks/evaluate_dimensions.py)
+    reduction = os.getenv('EMBEDDING_REDUCTION', '')
+    reducer = DimensionReducer(reduction, int(os.getenv('EMBEDDING_DIM', '128'))) if reduction else None
+    vector_store = VectorStoreManager(embedding_model, reducer=reducer)
+    vector_store.snapshot_retention = int(os.getenv('SNAPSHOT_RETENTION', '5'))
+    vector_store.search_threads = int(os.getenv('FAISS_SEARCH_THREADS', '1'))
+    vector_store.batch_search_threads = int(os.getenv('FAISS_BATCH_THREADS', '0'))
+
+    # Extractive FAQ/SOP answers need sentence embeddings, computed with the index
+    extractive = None
+    if os.getenv('EXTRACTIVE_ANSWERS', 'false').lower() == 'true':
+        vector_store.sentence_index = SentenceIndex(vector_store)
+        extractive = ExtractiveAnswerer(
+            vector_store.sentence_index,
+            min_score=float(os.getenv('EXTRACTIVE_MIN_SCORE', '0.7')),
+            max_sentences=int(os.getenv('EXTRACTIVE_MAX_SENTENCES', '3'))
+        )
     
+    data_loader = DataLoader(db_config)
+
     # 3. Try to load existing vector store
     if not force_reload and vector_store.load_vector_store():
         print("Using existing vector store")
     else:
         print("Creating new vector store...")
-        data_loader = DataLoader(db_config)
+        # Rows changed after this point are picked up by the sync worker
+        vector_store.source_watermark = to_db_timestamp(data_loader.current_timestamp())
         
         # This must return ONLY KB + Projects
         all_documents = data_loader.load_all_data()  
+
+        # Index one canonical copy of near-duplicate articles (variants kept in its metadata)
+        if os.getenv('DEDUP_THRESHOLD'):
+            detector = NearDuplicateDetector(threshold=float(os.getenv('DEDUP_THRESHOLD')))
+            all_documents, report = detector.deduplicate(all_documents)
+            print(f"✓ Dedup: {report['documents']} → {report['indexed']} documents "
+                  f"({report['reduction']:.1%} smaller, {report['duplicate_groups']} duplicate groups)")
         
         # Create vector embeddings
         vector_store.create_vector_store(all_documents)
         
         # Save for future use
         vector_store.save_vector_store()
+
+    # 4. Keep the index hot: apply row inserts/updates/deletes in the background
+    sync_interval = float(os.getenv('INDEX_SYNC_INTERVAL', '5'))
+    sync_worker = None
+    if sync_interval > 0:
+        sync_worker = IndexSyncWorker(
+            vector_store,
+            data_loader,
+            interval=sync_interval,
+            compaction_threshold=float(os.getenv('COMPACTION_DEAD_RATIO', '0.2'))
+        )
+        sync_worker.start()
+        print(f"✓ Index sync worker started (every {sync_interval:g}s)")
+
+    # Pick up snapshots published by other processes (e.g. `python main.py --reload`)
+    watch_interval = float(os.getenv('SNAPSHOT_WATCH_INTERVAL', '10'))
+    if watch_interval > 0:
+        SnapshotWatcher(vector_store, interval=watch_interval).start()
     
-    retriever = AdvancedRetriever(vector_store, db_config)  
+    # Optional cross-encoder re-ranking stage
+    rerank_model = os.getenv('RERANK_MODEL', '')
+    reranker = None
+    if rerank_model:
+        reranker = CrossEncoderReranker(
+            rerank_model,
+            max_latency_ms=float(os.getenv('RERANK_MAX_LATENCY_MS', '300'))
+        )
+
+    retriever = AdvancedRetriever(
+        vector_store,
+        db_config,
+        mode=os.getenv('RETRIEVAL_MODE', 'dense'),
+        hybrid_alpha=float(os.getenv('HYBRID_ALPHA', '0.7')),
+        reranker=reranker,
+        rerank_candidates=int(os.getenv('RERANK_CANDIDATES', '20')),
+        min_score=float(os.getenv('RETRIEVAL_MIN_SCORE', '0')),
+        mmr_lambda=float(os.getenv('MMR_LAMBDA')) if os.getenv('MMR_LAMBDA') else None,
+        mmr_fetch_k=int(os.getenv('MMR_FETCH_K', '20')),
+        router=SemanticRouter(
+            vector_store,
+            source_margin=float(os.getenv('SEMANTIC_ROUTING_MARGIN', '0.1'))
+        ) if os.getenv('SEMANTIC_ROUTING', 'false').lower() == 'true' else None
+    )
+    if retriever.router:
+        vector_store.swap_listeners.append(retriever.router.on_index_swap)
     
     model_name = os.getenv('OLLAMA_MODEL', 'llama3.1')
-    chatbot = SupportChatbot(retriever, model_name)
+
+    # Generation backends: one or more Ollama servers behind a load-balancing pool
+    endpoint_urls = os.getenv('OLLAMA_ENDPOINTS', os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434'))
+    max_concurrency = int(os.getenv('OLLAMA_MAX_CONCURRENCY', '4'))
+    llm_pool = LLMBackendPool(
+        [OllamaEndpoint(url.strip(), max_concurrency=max_concurrency) for url in endpoint_urls.split(',') if url.strip()],
+        model_name,
+        fallback_model=os.getenv('OLLAMA_FALLBACK_MODEL') or None,
+        strategy=os.getenv('LLM_ROUTING', 'least_loaded')
+    )
+    # Re-ranked top hits are precise enough to send a smaller context to the LLM
+    retrieval_k = int(os.getenv('RETRIEVAL_K', '3' if reranker else '5'))
+    # Adaptive routing: confident single-document questions go to a small, fast model
+    small_model = os.getenv('OLLAMA_SMALL_MODEL', '')
+    model_router = None
+    if small_model:
+        model_router = ModelRouter(
+            small_model,
+            model_name,
+            min_score=float(os.getenv('ROUTER_MIN_SCORE', '0.6')),
+            min_margin=float(os.getenv('ROUTER_MIN_MARGIN', '0.05'))
+        )
+
+    # Multi-query retrieval: 'tags' expands with related knowledgebase tags,
+    # 'llm' also asks the small model for paraphrases within a latency budget
+    expansion = os.getenv('QUERY_EXPANSION', 'off').lower()
+    if expansion in ('tags', 'llm'):
+        expansion_model = small_model or model_name
+        # Paraphrases run on their own endpoint if given; on the shared pool they only take idle slots
+        expansion_endpoint = os.getenv('QUERY_EXPANSION_ENDPOINT', '')
+        expansion_pool = LLMBackendPool(
+            [OllamaEndpoint(expansion_endpoint, max_concurrency=1)], expansion_model, health_check_interval=0
+        ) if expansion_endpoint else llm_pool
+        retriever.expander = QueryExpander(
+            vector_store,
+            max_variants=int(os.getenv('QUERY_EXPANSION_VARIANTS', '3')),
+            llm_generate=(
+                lambda prompt: expansion_pool.generate(prompt, model=expansion_model, blocking=False)[0].text
+            ) if expansion == 'llm' else None,
+            llm_budget_ms=float(os.getenv('QUERY_EXPANSION_BUDGET_MS', '150'))
+        )
+        vector_store.swap_listeners.append(retriever.expander.on_index_swap)
+
+    precompute_top_n = int(os.getenv('PRECOMPUTE_TOP_N', '50'))
+
+    # Compressed, rotating log of every answered question (written by a background thread)
+    query_log_dir = os.getenv('QUERY_LOG_DIR', 'logs/queries')
+    query_log = None
+    if query_log_dir:
+        query_log = QueryLog(
+            query_log_dir,
+            max_file_bytes=int(float(os.getenv('QUERY_LOG_FILE_MB', '64')) * 1024 * 1024),
+            max_files=int(os.getenv('QUERY_LOG_MAX_FILES', '30'))
+        )
+        query_log.start()
+        # Flush buffered records on any exit, including SIGTERM (turned into a normal exit)
+        atexit.register(query_log.close)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    session_store = SessionStore(
+        max_sessions=int(os.getenv('MAX_SESSIONS', '10000')),
+        ttl_seconds=float(os.getenv('SESSION_TTL_SECONDS', '1800')),
+        max_memory_bytes=int(float(os.getenv('SESSION_MEMORY_MB', '64')) * 1024 * 1024),
+        spill_path=os.getenv('SESSION_SPILL_PATH') or None
+    )
+    chatbot = SupportChatbot(
+        retriever,
+        model_name,
+        k=retrieval_k,
+        session_store=session_store,
+        llm_summaries=os.getenv('CONVERSATION_SUMMARIZER', 'extractive') == 'llm',
+        llm_pool=llm_pool,
+        model_router=model_router,
+        extractive=extractive,
+        precomputed=PrecomputedAnswers(top_n=precompute_top_n),
+        query_log=query_log
+    )
+    chatbot.sync_worker = sync_worker
+
+    # Regenerate answers for the most frequent logged questions against the fresh index,
+    # and again for the affected questions whenever the index changes
+    if precompute_top_n > 0:
+        chatbot.precomputed.refresh_async(
+            lambda question: chatbot.answer_question(question, background=True),
+            query_log_dir or os.getenv('TRACE_LOG')
+        )
+        vector_store.swap_listeners.append(chatbot.precomputed.on_index_swap)
     
     # print("\n✓ All components initialized successfully!")
     return chatbot
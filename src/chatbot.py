@@ -1,25 +1,57 @@
-from langchain_ollama import OllamaLLM
 from langchain.prompts import PromptTemplate
-from langchain_ollama import OllamaLLM
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 from typing import Dict, List
+import time
 import os
+from src.telemetry import telemetry
+from src.llm_pool import LLMBackendPool, OllamaEndpoint
+from src.conversation import ConversationMemory
+from src.session_store import SessionStore, SessionRecord
+from src.vector_store import doc_key
+
+
+# Returned without calling the LLM when retrieval finds nothing relevant
+FALLBACK_ANSWER = "The provided query does not contain information in the database"
 
 class SupportChatbot:
-    def __init__(self, retriever, model_name: str):
+    def __init__(self, retriever, model_name: str, llm=None, k: int = 5, session_store: SessionStore = None,
+                 llm_summaries: bool = False, llm_pool: LLMBackendPool = None, model_router=None,
+                 extractive=None, precomputed=None, query_log=None):
         self.retriever = retriever
         self.model_name = model_name
+        # Documents retrieved per question (lower when a re-ranker sharpens the top hits)
+        self.k = k
+        # Fold old turns into the rolling summary with the LLM instead of extractively
+        self.llm_summaries = llm_summaries
+        # Per-session state (memory, last docs, cached embeddings) with LRU/TTL/memory-cap eviction
+        self.sessions = session_store or SessionStore()
+        # New and restored sessions get memories wired to this chatbot's summarizer
+        self.sessions.memory_factory = self._new_memory
+        # Background IndexSyncWorker, if one was started (see main.initialize_system)
+        self.sync_worker = None
         
-        # Initialize Ollama LLM
-        # print(f"Initializing {model_name} model...")
-        self.llm = OllamaLLM(
-            model=model_name,
-            temperature=0.3,  # Lower for more factual responses
-        )
+        # Generation backends: an explicit pool, a single injected llm (e.g. the
+        # benchmark stub), or the local Ollama server
+        if llm_pool is None:
+            if llm is not None:
+                endpoint = OllamaEndpoint("local", llm_factory=lambda model: llm)
+            else:
+                endpoint = OllamaEndpoint(
+                    os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434'),
+                    temperature=0.3,  # Lower for more factual responses
+                )
+            llm_pool = LLMBackendPool([endpoint], model_name, health_check_interval=0)
+        self.llm_pool = llm_pool
+        # Optional ModelRouter: small model for confident single-document hits, large otherwise
+        self.model_router = model_router
+        # Optional ExtractiveAnswerer: confident FAQ/SOP hits are answered from stored sentences
+        self.extractive = extractive
+        # Optional PrecomputedAnswers for the most frequent questions, checked before retrieval
+        self.precomputed = precomputed
+        # Optional QueryLog (background, compressed) of every answered question
+        self.query_log = query_log
         
         self.prompt_template = PromptTemplate(
-            input_variables=["question", "context"],
+            input_variables=["question", "context", "history"],
             template="""You are an AI support assistant with access to the company's knowledge base and project information.
 
                         Answer the user question using ONLY the provided context. Be concise and precise.
@@ -27,6 +59,9 @@ class SupportChatbot:
                         Context:
                         {context}
 
+                        Conversation so far:
+                        {history}
+
                         User Question:
                         {question}
 
@@ -42,8 +77,6 @@ class SupportChatbot:
 
                         """
                                 )
-        
-        self.chain = LLMChain(llm=self.llm, prompt=self.prompt_template)
     
     def format_context(self, context: Dict) -> str:
         formatted_parts = []
@@ -55,46 +88,187 @@ class SupportChatbot:
                 kb_text += f"{i}. {doc.page_content[:300]}...\n"
             formatted_parts.append(kb_text)
         
+        # Live project rows matching a structured question (complete list, not top-k)
+        if context.get('structured'):
+            rec_text = "\n\nPROJECT RECORDS (live database):\n"
+            for i, doc in enumerate(context['structured'], 1):
+                meta = doc.metadata
+                rec_text += (f"{i}. {meta['project_name']} | Status: {meta['status']} | "
+                             f"Start: {meta['start_date']} | Tech: {meta['tech_stack']}\n")
+            formatted_parts.append(rec_text)
+
         # Projects
-        if context['projects']:
+        related = [doc for doc in context['projects'] if not doc.metadata.get('structured')]
+        if related:
             proj_text = "\n\nRELATED PROJECTS:\n"
-            for i, doc in enumerate(context['projects'][:2], 1):
+            for i, doc in enumerate(related[:2], 1):
                 proj_text += f"{i}. {doc.page_content[:200]}...\n"
             formatted_parts.append(proj_text)
         
         return "\n".join(formatted_parts) if formatted_parts else "No relevant context found."
 
 
-    def answer_question(self, question: str) -> Dict:
-        """Answer user questions using ONLY KB + project info"""
+    def _new_memory(self) -> ConversationMemory:
+        summarizer = self._summarize_with_llm if self.llm_summaries else None
+        return ConversationMemory(summarizer=summarizer)
+
+    def get_session(self, session_id: str) -> SessionRecord:
+        """Return (creating or restoring if needed) the state for a session"""
+        return self.sessions.get(session_id)
+
+    def _summarize_with_llm(self, summary: str, question: str, answer: str) -> str:
+        prompt = (
+            "Update the running summary of a support conversation in at most 2 sentences.\n\n"
+            f"Summary so far: {summary or 'None'}\n\n"
+            f"New exchange:\nUser: {question}\nAssistant: {answer}\n\n"
+            "Updated summary:"
+        )
+        generation, _ = self.llm_pool.generate(prompt)
+        return generation.text.strip()
+
+    def end_session(self, session_id: str) -> None:
+        self.sessions.drop(session_id)
+
+    def answer_question(self, question: str, session_id: str = None, background: bool = False) -> Dict:
+        """
+        Answer user questions using ONLY KB + project info.
+        background=True is for maintenance jobs (precomputing answers): the
+        precomputed table is bypassed and the trace is marked so query-log
+        analytics ignore it.
+
+        Safe to call from many threads on one SupportChatbot: shared
+        components are thread-safe, and requests for the same session are
+        serialized so its memory is never updated concurrently.
+        """
+        if not session_id:
+            return self._answer(question, None, background)
+        with self.sessions.checkout(session_id) as session:
+            return self._answer(question, session, background)
+
+    def _answer(self, question: str, session: SessionRecord, background: bool) -> Dict:
+        trace = telemetry.start_trace(question)
+
+        # Follow-ups are rewritten into standalone questions for retrieval
+        memory = session.memory if session else None
+        standalone = memory.rewrite_query(question) if memory else question
+        trace.attributes.update({'standalone': standalone, 'background': background})
+
+        # Hot questions are served from the precomputed table
+        hit = self.precomputed.lookup(standalone) if self.precomputed and not background else None
+        if hit:
+            telemetry.events.inc('precomputed_answer_hit')
+            if session:
+                memory.add_turn(question, standalone, hit['answer'])
+                self.sessions.update(session)
+            trace.attributes.update({'model': hit['model_used'], 'precomputed': True})
+            result = {
+                **hit,
+                'standalone_question': standalone,
+                'timings_ms': telemetry.finish_trace(trace),
+                'tokens': {'prompt': 0, 'completion': 0},
+                'routing_reason': "precomputed"
+            }
+            self._log_query(question, result, None, background)
+            return result
+
+        # Re-asked questions in a session reuse their query embedding (until the embedding function changes)
+        embedding_version = self.retriever.vector_store.embedding_version
+        query_vector = session.cached_embedding(standalone, embedding_version) if session else None
+        if query_vector is None and (session or self.extractive):
+            with telemetry.stage('query_embedding'):
+                query_vector = self.retriever.vector_store.embed_query(standalone)
+            if session:
+                session.cache_embedding(standalone, query_vector, embedding_version)
       
         # Retrieve relevant context
-        context = self.retriever.retrieve_context(question, k=5)
+        with telemetry.stage('retrieve_context'):
+            context = self.retriever.retrieve_context(standalone, k=self.k, query_vector=query_vector)
 
-        # Format context for prompt
-        formatted_context = self.format_context(context)
-        
-        # Generate response
-        response = self.chain.invoke({
-            "question": question,
-            "context": formatted_context
-        })
-        
-        # Extract text
-        if isinstance(response, dict):
-            response = response.get('text', str(response))
+        gated = context.get('low_confidence', False)
+        telemetry.events.inc('retrieval_gate_fired' if gated else 'retrieval_gate_passed')
+
+        extracted = None
+        if self.extractive and not gated:
+            with telemetry.stage('extractive_answer'):
+                extracted = self.extractive.answer(context, query_vector)
+
+        model, routing_reason = None, None
+        if gated:
+            # Nothing relevant retrieved: skip the LLM and answer with the fallback
+            response, generation_info = FALLBACK_ANSWER, None
+            route = {'model': None, 'endpoint': None}
+            routing_reason = "retrieval gate"
+        elif extracted:
+            # Confident FAQ/SOP hit: answer with the article's best sentences
+            telemetry.events.inc('extractive_answer')
+            response, generation_info = extracted['answer'], None
+            route = {'model': None, 'endpoint': None}
+            routing_reason = f"extractive ({extracted['source']})"
         else:
-            response = str(response)
+            # Format context for prompt
+            with telemetry.stage('format_context'):
+                formatted_context = self.format_context(context)
 
+            prompt = self.prompt_template.format(
+                question=question,
+                context=formatted_context,
+                history=memory.history_text() if memory else "None"
+            )
+
+            if self.model_router:
+                model, routing_reason = self.model_router.choose(context)
+
+            # Generate response on the least-loaded backend (generation_info keeps Ollama's token counts)
+            with telemetry.stage('llm_generate'):
+                generation, route = self.llm_pool.generate(prompt, model=model)
+            if self.model_router:
+                self.model_router.record(route['model'], telemetry.current_trace().timings['llm_generate'])
+            response, generation_info = generation.text, generation.generation_info
+
+        if session:
+            memory.add_turn(question, standalone, response.strip())
+            session.last_doc_keys = tuple(doc_key(doc.metadata) for doc in context['all_docs'])
+            self.sessions.update(session)
+        tokens = telemetry.record_tokens(generation_info)
+
+        trace.attributes.update({'model': route['model'], 'endpoint': route['endpoint'], 'tokens': tokens})
+        timings = telemetry.finish_trace(trace)
         
-        return {
+        result = {
             'answer': response.strip(),
+            'standalone_question': standalone,
             # 'troubleshooting_steps': suggestions,
             'sources_used': {
                 'knowledgebase': len(context['knowledgebase']),
                 'projects': len(context['projects']),
-            }
+                'structured': len(context['structured']),
+            },
+            # Row keys the answer was built from (precomputed answers are invalidated by them)
+            'source_keys': [doc_key(doc.metadata) for doc in context['all_docs']],
+            'timings_ms': timings,
+            'tokens': tokens,
+            'model_used': route['model'],
+            'routing_reason': routing_reason
         }
+        self._log_query(question, result, context, background)
+        return result
+
+    def _log_query(self, question: str, result: Dict, context: Dict = None, background: bool = False) -> None:
+        """Hand a compact record to the query log (enqueue only; written off the request path)"""
+        if self.query_log is None:
+            return
+        self.query_log.log({
+            'ts': time.time(),
+            'question': question,
+            'standalone': result['standalone_question'],
+            'docs': [doc_key(doc.metadata) for doc in context['all_docs']] if context else [],
+            'scores': [round(score, 4) for score in context['scores']] if context else [],
+            'model': result['model_used'],
+            'routing': result['routing_reason'],
+            'timings_ms': result['timings_ms'],
+            'tokens': result['tokens'],
+            'background': background,
+        })
     
     def chat(self):
 
@@ -111,11 +285,22 @@ class SupportChatbot:
                 continue
             
             if user_input.lower() == 'exit':
+                metrics_file = os.getenv('METRICS_FILE')
+                if metrics_file:
+                    telemetry.write_prometheus(metrics_file)
+                if self.query_log:
+                    self.query_log.close()
+                if self.model_router:
+                    print(f"\n📊 Model routing: {self.model_router.report()}")
+                fired = telemetry.events.value('retrieval_gate_fired')
+                answered = fired + telemetry.events.value('retrieval_gate_passed')
+                if fired:
+                    print(f"📊 Retrieval gate: {fired:g}/{answered:g} questions answered without the LLM")
                 print("\nGoodbye! 👋")
                 break
             
             try:
-                result = self.answer_question(user_input)
+                result = self.answer_question(user_input, session_id="cli")
                 
                 print(f"\n🤖 Assistant: {result['answer']}\n")
                 
@@ -127,6 +312,10 @@ class SupportChatbot:
                 print(f"📚 Sources: "
                       f"KB({result['sources_used']['knowledgebase']}) | "
                       f"Projects({result['sources_used']['projects']})\n")
+                print(f"⏱️  {result['timings_ms']['total']:.0f} ms "
+                      f"(retrieval {result['timings_ms'].get('retrieve_context', 0):.0f} ms, "
+                      f"LLM {result['timings_ms'].get('llm_generate', 0):.0f} ms, "
+                      f"{result['tokens']['completion']} tokens)\n")
     
                 
             except Exception as e:
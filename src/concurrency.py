@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+import threading
+import faiss
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer. Writers are preferred: once a
+    writer is waiting, new readers queue behind it, so a steady stream of
+    searches cannot starve an index swap.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+_omp = threading.local()
+# FAISS's default (all cores), captured before any thread lowers its own count
+DEFAULT_OMP_THREADS = faiss.omp_get_max_threads()
+
+
+def set_omp_threads(n: int) -> None:
+    """
+    Set the OpenMP thread count FAISS uses for searches issued from the
+    calling thread (omp_set_num_threads is per-thread). 0 means FAISS's
+    default (all cores). Repeated calls with the same value are free.
+    """
+    n = n or DEFAULT_OMP_THREADS
+    if getattr(_omp, 'threads', None) != n:
+        faiss.omp_set_num_threads(n)
+        _omp.threads = n
@@ -0,0 +1,119 @@
+from collections import deque
+from typing import Callable, Optional
+import re
+from src.structured_query import PRODUCT_LINES
+
+
+FOLLOW_UP_PREFIX = re.compile(r"^\s*(what about|how about|and what about|and|also|same for|what if)\b[\s,]*", re.I)
+FOLLOW_UP_REFERENCE = re.compile(r"\b(it|its|that|this|those|these|they|them|same)\b", re.I)
+# A reference word opening the question ("Is it still active?", "Those are on Vivant?")
+FOLLOW_UP_LEADING = re.compile(
+    r"^\s*((is|are|was|were|does|do|did|can|will|should|why|how|when|who|what)\s+)?"
+    r"(it|its|that|this|those|these|they|them|same)\b", re.I)
+# Pronouns are common in standalone questions ("Is there a project that ..."), so a
+# reference anywhere only marks a follow-up in a question this short
+FOLLOW_UP_MAX_WORDS = 6
+# Upper bound on a rewritten question; the previous question is shortened to fit
+STANDALONE_MAX_CHARS = 300
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting"""
+    return max(1, len(text) // 4)
+
+
+class ConversationMemory:
+    """
+    Bounded multi-turn state for one chat session.
+
+    Follow-ups are rewritten into standalone questions for retrieval, always
+    from the last question the user asked in full (`last_standalone`), never
+    from an earlier rewrite, so they don't nest. The history passed to the prompt is kept within `max_history_tokens`:
+    the oldest turns are folded into a rolling summary that itself never
+    exceeds `max_summary_tokens`, so prompt size stays flat as the chat grows.
+    """
+
+    __slots__ = ('max_history_tokens', 'max_summary_tokens', 'summarizer', 'turns', 'summary', 'last_standalone')
+
+    def __init__(self, max_history_tokens: int = 400, max_summary_tokens: int = 150,
+                 summarizer: Optional[Callable[[str, str, str], str]] = None):
+        self.max_history_tokens = max_history_tokens
+        self.max_summary_tokens = max_summary_tokens
+        # summarizer(previous_summary, question, answer) -> new summary; extractive by default
+        self.summarizer = summarizer or self._extractive_summary
+        self.turns = deque()
+        self.summary = ""
+        self.last_standalone = None
+
+    def is_follow_up(self, question: str) -> bool:
+        if self.last_standalone is None:
+            return False
+        # Shortness alone is not a reference: "printer jam" is a new question
+        return bool(FOLLOW_UP_PREFIX.search(question)
+                    or FOLLOW_UP_LEADING.search(question)
+                    or (len(question.split()) <= FOLLOW_UP_MAX_WORDS and FOLLOW_UP_REFERENCE.search(question)))
+
+    def rewrite_query(self, question: str) -> str:
+        """Turn a follow-up ("what about for Vivant?") into a standalone question"""
+        if not self.is_follow_up(question):
+            return question
+
+        previous = self.last_standalone[:STANDALONE_MAX_CHARS]
+        fragment = FOLLOW_UP_PREFIX.sub("", question).strip(" ?.!")
+        fragment = re.sub(r"^(for|in|with|on)\s+", "", fragment, flags=re.I)
+
+        # Swap the product line: "How do I reset Milagro kiosks?" + "what about Vivant" -> "... Vivant ..."
+        new_product = next((p for p in PRODUCT_LINES if p in fragment.lower()), None)
+        old_product = next((p for p in PRODUCT_LINES if p in previous.lower()), None)
+        if new_product and old_product and new_product != old_product:
+            rewritten = re.sub(old_product, new_product.capitalize(), previous, flags=re.I)
+            remainder = re.sub(new_product, "", fragment, flags=re.I).strip()
+            return f"{rewritten} {remainder}".strip()[:STANDALONE_MAX_CHARS] if remainder else rewritten
+
+        if not fragment:
+            return previous
+        context = previous[:max(0, STANDALONE_MAX_CHARS - len(fragment) - 3)]
+        return f"{fragment} ({context})" if context else fragment[:STANDALONE_MAX_CHARS]
+
+    def add_turn(self, question: str, standalone: str, answer: str) -> None:
+        self.turns.append((question, answer))
+        # Only a question asked in full becomes the base for later follow-ups
+        if standalone == question:
+            self.last_standalone = standalone
+
+        while len(self.turns) > 1 and self._history_tokens() > self.max_history_tokens:
+            old_question, old_answer = self.turns.popleft()
+            self.summary = self.summarizer(self.summary, old_question, old_answer)
+            self._trim_summary()
+
+        # A single turn over the budget on its own is truncated (question up to half of it)
+        if self._history_tokens() > self.max_history_tokens:
+            question, answer = self.turns[0]
+            max_chars = self.max_history_tokens * 4
+            question = question if len(question) <= max_chars // 2 else question[:max_chars // 2] + "…"
+            answer_chars = max(0, max_chars - len(question))
+            answer = answer if len(answer) <= answer_chars else answer[:answer_chars] + "…"
+            self.turns[0] = (question, answer)
+
+    def history_text(self) -> str:
+        """History block for the prompt: rolling summary plus the most recent turns"""
+        parts = []
+        if self.summary:
+            parts.append(f"Earlier in this conversation: {self.summary}")
+        for question, answer in self.turns:
+            parts.append(f"User: {question}\nAssistant: {answer}")
+        return "\n".join(parts) if parts else "None"
+
+    def _history_tokens(self) -> int:
+        return sum(estimate_tokens(q) + estimate_tokens(a) for q, a in self.turns)
+
+    def _extractive_summary(self, summary: str, question: str, answer: str) -> str:
+        # Keep the question and the first sentence of the answer
+        first_sentence = re.split(r"(?<=[.!?])\s", answer.strip(), maxsplit=1)[0]
+        return f"{summary} Q: {question} A: {first_sentence}".strip()
+
+    def _trim_summary(self) -> None:
+        # Drop the oldest summary content once over budget
+        max_chars = self.max_summary_tokens * 4
+        if len(self.summary) > max_chars:
+            self.summary = "…" + self.summary[-max_chars:]
@@ -1,4 +1,4 @@
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from typing import List, Dict
 import json
 
@@ -18,21 +18,21 @@ class DataLoader:
             result = conn.execute(text(query))
             rows = result.fetchall()
             
-            documents = []
-            for row in rows:
-                doc = {
-                    'id': row[0],
-                    'title': row[1],
-                    'content': row[2],
-                    'category': row[3],
-                    'tags': row[4],
-                    'created_date': row[5],
-                    'source': 'knowledgebase',
-                    'text': f"Title: {row[1]}\nCategory: {row[3]}\n\n{row[2]}"
-                }
-                documents.append(doc)
-            
-            return documents
+            return [self.knowledgebase_row_to_doc(row) for row in rows]
+
+    @staticmethod
+    def knowledgebase_row_to_doc(row) -> Dict:
+        """Convert a knowledgebase row (id, title, content, category, tags, created_date)"""
+        return {
+            'id': row[0],
+            'title': row[1],
+            'content': row[2],
+            'category': row[3],
+            'tags': row[4],
+            'created_date': row[5],
+            'source': 'knowledgebase',
+            'text': f"Title: {row[1]}\nCategory: {row[3]}\n\n{row[2]}"
+        }
     
     def load_projects(self) -> List[Dict]:
         """Load all project information"""
@@ -47,23 +47,103 @@ class DataLoader:
             result = conn.execute(text(query))
             rows = result.fetchall()
             
-            documents = []
-            for row in rows:
-                metadata_json = row[6] if row[6] else '{}'
-                doc = {
-                    'id': row[0],
-                    'project_name': row[1],
-                    'description': row[2],
-                    'tech_stack': row[3],
-                    'status': row[4],
-                    'start_date': row[5],
-                    'metadata': metadata_json,
-                    'source': 'projects',
-                    'text': f"Project: {row[1]}\nStatus: {row[4]}\nTech Stack: {row[3]}\n\nDescription: {row[2]}"
-                }
+            return [self.project_row_to_doc(row) for row in rows]
+
+    @staticmethod
+    def project_row_to_doc(row) -> Dict:
+        """Convert a projects row (id, project_name, description, tech_stack, status, start_date, metadata)"""
+        metadata_json = row[6] if row[6] else '{}'
+        return {
+            'id': row[0],
+            'project_name': row[1],
+            'description': row[2],
+            'tech_stack': row[3],
+            'status': row[4],
+            'start_date': row[5],
+            'metadata': metadata_json,
+            'source': 'projects',
+            'text': f"Project: {row[1]}\nStatus: {row[4]}\nTech Stack: {row[3]}\n\nDescription: {row[2]}"
+        }
+
+    def load_changes(self, since) -> List[Dict]:
+        """
+        Load rows inserted or updated at or after `since` (a DB timestamp).
+        Each returned doc carries an extra 'updated_at' for watermarking.
+        """
+        kb_query = """
+        SELECT id, title, content, category, tags,
+               DATE_FORMAT(created_at, '%Y-%m-%d') as created_date,
+               updated_at
+        FROM knowledgebase
+        WHERE updated_at >= :since
+        """
+        project_query = """
+        SELECT id, project_name, description, tech_stack,
+               status, DATE_FORMAT(start_date, '%Y-%m-%d') as start_date,
+               metadata, updated_at
+        FROM projects
+        WHERE updated_at >= :since
+        """
+
+        documents = []
+        with self.db_config.engine.connect() as conn:
+            for row in conn.execute(text(kb_query), {'since': since}).fetchall():
+                doc = self.knowledgebase_row_to_doc(row)
+                doc['updated_at'] = row[6]
                 documents.append(doc)
-            
-            return documents
+
+            for row in conn.execute(text(project_query), {'since': since}).fetchall():
+                doc = self.project_row_to_doc(row)
+                doc['updated_at'] = row[7]
+                documents.append(doc)
+
+        return documents
+
+    def load_rows(self, keys) -> List[Dict]:
+        """Load specific rows by key ('knowledgebase:12', 'projects:3')"""
+        ids = {'knowledgebase': [], 'projects': []}
+        for key in keys:
+            source, _, row_id = key.partition(':')
+            if source in ids:
+                ids[source].append(int(row_id))
+
+        kb_query = text("""
+        SELECT id, title, content, category, tags,
+               DATE_FORMAT(created_at, '%Y-%m-%d') as created_date
+        FROM knowledgebase
+        WHERE id IN :ids
+        """).bindparams(bindparam('ids', expanding=True))
+        project_query = text("""
+        SELECT id, project_name, description, tech_stack,
+               status, DATE_FORMAT(start_date, '%Y-%m-%d') as start_date,
+               metadata
+        FROM projects
+        WHERE id IN :ids
+        """).bindparams(bindparam('ids', expanding=True))
+
+        documents = []
+        with self.db_config.engine.connect() as conn:
+            if ids['knowledgebase']:
+                rows = conn.execute(kb_query, {'ids': ids['knowledgebase']}).fetchall()
+                documents += [self.knowledgebase_row_to_doc(row) for row in rows]
+            if ids['projects']:
+                rows = conn.execute(project_query, {'ids': ids['projects']}).fetchall()
+                documents += [self.project_row_to_doc(row) for row in rows]
+        return documents
+
+    def load_keys(self) -> set:
+        """Keys ('source:id') of every row currently in the database"""
+        with self.db_config.engine.connect() as conn:
+            kb_ids = conn.execute(text("SELECT id FROM knowledgebase")).fetchall()
+            project_ids = conn.execute(text("SELECT id FROM projects")).fetchall()
+
+        return ({f"knowledgebase:{row[0]}" for row in kb_ids} |
+                {f"projects:{row[0]}" for row in project_ids})
+
+    def current_timestamp(self):
+        """Database clock, used as the sync watermark"""
+        with self.db_config.engine.connect() as conn:
+            return conn.execute(text("SELECT NOW()")).scalar()
 
     def load_all_data(self) -> List[Dict]:
         """Load all data from all sources"""
@@ -0,0 +1,118 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import numpy as np
+import zlib
+import re
+from src.vector_store import doc_key
+
+
+# Mersenne prime for the universal hash family used by MinHash
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def choose_canonical(group: List[Dict]) -> Dict:
+    """
+    Pick the document indexed for a group of near-duplicates: the longest
+    (most complete) variant, with the other rows' keys in `variants`.
+    Also used to promote a survivor when a canonical row is deleted.
+    """
+    group = sorted(group, key=lambda doc: (-len(doc['text']), str(doc.get('id'))))
+    representative = dict(group[0])
+    representative.pop('variants', None)
+    if len(group) > 1:
+        representative['variants'] = [doc_key(doc) for doc in group[1:]]
+    return representative
+
+
+class NearDuplicateDetector:
+    """
+    MinHash + LSH near-duplicate grouping for documents about to be indexed.
+
+    Each document is reduced to word shingles and a `num_perm` MinHash
+    signature; signatures are split into `bands` LSH bands so only documents
+    sharing a band are compared. Pairs whose estimated Jaccard similarity is
+    >= `threshold` are grouped (union-find), and each group is indexed as one
+    canonical document (the longest, i.e. most complete, variant) whose
+    metadata lists the other variants' keys.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+        # a < 2^29 and 32-bit shingle hashes keep a * h + b below 2^63 (no uint64 overflow)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 29, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> set:
+        words = re.findall(r"\w+", text.lower())
+        n = self.shingle_size
+        if len(words) < n:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.array([zlib.crc32(s.encode('utf-8')) for s in self.shingles(text)], dtype=np.uint64)
+        # (a * h + b) mod p for every permutation at once
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def groups(self, documents: List[Dict]) -> List[List[int]]:
+        """Indices of near-duplicate documents, grouped (singletons included)"""
+        signatures = [self.signature(doc['text']) for doc in documents]
+        rows = self.num_perm // self.bands
+
+        parent = list(range(len(documents)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for band in range(self.bands):
+            buckets = defaultdict(list)
+            for i, sig in enumerate(signatures):
+                # Only documents from the same table can be variants of each other
+                buckets[(documents[i].get('source'), sig[band * rows:(band + 1) * rows].tobytes())].append(i)
+            # Every pair in a bucket: A~B and B~C must group A, B and C even if A and C differ more
+            for members in buckets.values():
+                for n, first in enumerate(members):
+                    for other in members[n + 1:]:
+                        if find(first) == find(other):
+                            continue
+                        if np.mean(signatures[first] == signatures[other]) >= self.threshold:
+                            parent[find(other)] = find(first)
+
+        grouped = defaultdict(list)
+        for i in range(len(documents)):
+            grouped[find(i)].append(i)
+        return list(grouped.values())
+
+    def deduplicate(self, documents: List[Dict]) -> Tuple[List[Dict], Dict]:
+        """
+        Returns (canonical documents, report). Each canonical document gets
+        `variants` (keys of the rows folded into it) in its metadata.
+        """
+        canonical = []
+        back_map = {}
+        for members in self.groups(documents):
+            representative = choose_canonical([documents[i] for i in members])
+            if 'variants' in representative:
+                back_map[doc_key(representative)] = representative['variants']
+            canonical.append(representative)
+
+        report = {
+            'documents': len(documents),
+            'indexed': len(canonical),
+            'duplicate_groups': len(back_map),
+            'removed': len(documents) - len(canonical),
+            'reduction': round(1 - len(canonical) / len(documents), 4) if documents else 0.0,
+        }
+        return canonical, report
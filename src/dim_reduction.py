@@ -0,0 +1,108 @@
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from typing import List
+import numpy as np
+import faiss
+import json
+import os
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed several queries in one forward pass, each exactly as embed_query
+    would. An Embeddings class can provide this as an `embed_queries` method.
+    """
+    batched = getattr(embeddings, 'embed_queries', None)
+    if batched is not None:
+        return batched(texts)
+    if type(embeddings) is HuggingFaceEmbeddings:
+        # Its embed_query is embed_documents([text])[0]: same prompt and encode_kwargs
+        return embeddings.embed_documents(texts)
+    return [embeddings.embed_query(text) for text in texts]
+
+
+class DimensionReducer:
+    """
+    Shrinks embeddings to `dim` dimensions before they are indexed or searched.
+
+    method 'truncate' keeps the leading dimensions (Matryoshka-trained models
+    such as EmbeddingGemma or nomic-embed put most information there);
+    method 'pca' projects onto the top principal components, fitted on the
+    corpus at build time and saved with the index. Output is re-normalized,
+    so cosine/L2 scoring is unchanged.
+
+    PCA cannot output more components than it has training rows, so on a
+    small corpus it is fitted to fewer than `dim` dimensions (`output_dim`).
+    """
+
+    def __init__(self, method: str, dim: int):
+        if method not in ('pca', 'truncate'):
+            raise ValueError(f"Unknown reduction method: {method}")
+        self.method = method
+        self.dim = dim
+        self.pca = None
+
+    @property
+    def fitted(self) -> bool:
+        return self.method == 'truncate' or self.pca is not None
+
+    @property
+    def output_dim(self) -> int:
+        return self.pca.d_out if self.pca is not None else self.dim
+
+    def describe(self) -> dict:
+        return {'method': self.method, 'dim': self.dim}
+
+    def fit(self, matrix: np.ndarray) -> None:
+        if self.method != 'pca':
+            return
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        dim = min(self.dim, *matrix.shape)
+        if dim < self.dim:
+            print(f"⚠️  EMBEDDING_DIM={self.dim} is more than PCA can fit on {matrix.shape[0]} documents "
+                  f"of {matrix.shape[1]} dims; using {dim}. Lower EMBEDDING_DIM to silence this.")
+        pca = faiss.PCAMatrix(matrix.shape[1], dim)
+        pca.train(matrix)
+        self.pca = pca
+
+    def transform(self, matrix) -> np.ndarray:
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if self.method == 'truncate':
+            reduced = np.ascontiguousarray(matrix[:, :self.dim])
+        else:
+            if self.pca is None:
+                raise ValueError("PCA reduction is not fitted; rebuild the index")
+            reduced = self.pca.apply_py(matrix)
+        faiss.normalize_L2(reduced)
+        return reduced
+
+    def save(self, directory: str) -> None:
+        with open(os.path.join(directory, "reduction.json"), "w") as f:
+            json.dump(self.describe(), f)
+        if self.pca is not None:
+            faiss.write_VectorTransform(self.pca, os.path.join(directory, "pca.bin"))
+
+    def load(self, directory: str) -> bool:
+        pca_path = os.path.join(directory, "pca.bin")
+        if self.method == 'pca':
+            if not os.path.exists(pca_path):
+                return False
+            self.pca = faiss.read_VectorTransform(pca_path)
+        return True
+
+
+class ReducedEmbeddings(Embeddings):
+    """Embeddings wrapper that passes every document/query vector through a DimensionReducer"""
+
+    def __init__(self, base: Embeddings, reducer: DimensionReducer):
+        self.base = base
+        self.reducer = reducer
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.reducer.transform(self.base.embed_documents(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.reducer.transform([self.base.embed_query(text)])[0].tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.reducer.transform(embed_queries(self.base, texts)).tolist()
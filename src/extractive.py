@@ -0,0 +1,149 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import json
+import re
+import os
+from src.vector_store import doc_key
+
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+# Header DataLoader.knowledgebase_row_to_doc puts in front of the article in page_content
+KB_TEXT_HEADER = re.compile(r"\ATitle: [^\n]*\nCategory: [^\n]*\n\n")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split article text into sentences / lines (SOP steps are usually one per line)"""
+    return [s.strip() for s in SENTENCE_SPLIT.split(text or "") if len(s.strip()) > 3]
+
+
+class SentenceIndex:
+    """
+    Per-article sentence embeddings for FAQ/SOP knowledgebase rows.
+
+    Built alongside the FAISS index (VectorStoreManager calls build /
+    apply_changes / save / load), so answering never embeds article text.
+    """
+
+    def __init__(self, vector_store_manager, categories=('faq', 'sop')):
+        self.vector_store = vector_store_manager
+        self.categories = tuple(c.lower() for c in categories)
+        # row key -> (sentences, float32 matrix of normalized sentence embeddings)
+        self._entries = {}
+
+    def eligible(self, doc: Dict) -> bool:
+        return (doc.get('source') == 'knowledgebase'
+                and str(doc.get('category') or '').lower() in self.categories)
+
+    def _embed(self, docs: List[Dict], embed_texts=None) -> Dict[str, Tuple[List[str], np.ndarray]]:
+        # Indexed documents keep only page_content (see compact_metadata); quote the article, not its labels
+        per_doc = [(doc_key(doc), split_sentences(doc.get('content') or KB_TEXT_HEADER.sub("", doc.get('text') or "")))
+                   for doc in docs]
+        per_doc = [(key, sentences) for key, sentences in per_doc if sentences]
+        if not per_doc:
+            return {}
+
+        # One batched forward pass for every sentence
+        vectors = (embed_texts or self.vector_store.embed_texts)([s for _, sentences in per_doc for s in sentences])
+        entries, offset = {}, 0
+        for key, sentences in per_doc:
+            entries[key] = (sentences, vectors[offset:offset + len(sentences)])
+            offset += len(sentences)
+        return entries
+
+    def build(self, documents: List[Dict]) -> None:
+        self._entries = self.embed_documents(documents)
+        print(f"✓ Sentence index built for {len(self._entries)} FAQ/SOP articles")
+
+    def embed_documents(self, documents: List[Dict], embed_texts=None) -> Dict:
+        """Entries for `documents` without touching the live index (see use())"""
+        return self._embed([doc for doc in documents if self.eligible(doc)], embed_texts)
+
+    def use(self, entries: Dict) -> None:
+        """Make entries from read() / embed_documents() live, e.g. with a newly loaded snapshot"""
+        self._entries = entries
+
+    def apply_changes(self, upserts: List[Dict], deleted_keys: List[str]) -> None:
+        fresh = self._embed([doc for doc in upserts if self.eligible(doc)])
+        # Copy-on-write: readers keep the old dict until the swap
+        entries = dict(self._entries)
+        for key in list(deleted_keys) + [doc_key(doc) for doc in upserts]:
+            entries.pop(key, None)
+        entries.update(fresh)
+        self._entries = entries
+
+    def get(self, key: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        return self._entries.get(key)
+
+    def save(self, directory: str) -> None:
+        keys = list(self._entries)
+        with open(os.path.join(directory, "sentences.json"), "w", encoding="utf-8") as f:
+            json.dump({key: self._entries[key][0] for key in keys}, f)
+        matrix = (np.vstack([self._entries[key][1] for key in keys]) if keys
+                  else np.zeros((0, 0), dtype=np.float32))
+        np.save(os.path.join(directory, "sentences.npy"), matrix)
+
+    def load(self, directory: str) -> bool:
+        entries = self.read(directory)
+        if entries is None:
+            return False
+        self._entries = entries
+        return True
+
+    def read(self, directory: str) -> Optional[Dict]:
+        """Saved entries of a snapshot directory, or None if it has none"""
+        json_path = os.path.join(directory, "sentences.json")
+        npy_path = os.path.join(directory, "sentences.npy")
+        if not (os.path.exists(json_path) and os.path.exists(npy_path)):
+            return None
+
+        with open(json_path, encoding="utf-8") as f:
+            sentences = json.load(f)
+        matrix = np.load(npy_path)
+        entries, offset = {}, 0
+        for key, doc_sentences in sentences.items():
+            entries[key] = (doc_sentences, matrix[offset:offset + len(doc_sentences)])
+            offset += len(doc_sentences)
+        return entries
+
+
+class ExtractiveAnswerer:
+    """
+    Answers FAQ/SOP questions without the LLM.
+
+    When the top retrieved document is an FAQ/SOP article with similarity
+    >= min_score, the sentences of that article closest to the question
+    are returned in their original order (steps stay in sequence).
+    """
+
+    def __init__(self, sentence_index: SentenceIndex, min_score: float = 0.7,
+                 max_sentences: int = 3, min_sentence_score: float = 0.3):
+        self.sentence_index = sentence_index
+        self.min_score = min_score
+        self.max_sentences = max_sentences
+        self.min_sentence_score = min_sentence_score
+
+    def answer(self, context: Dict, query_vector) -> Optional[Dict]:
+        """Return {'answer', 'source', 'score'} or None when the LLM should answer"""
+        if context.get('structured') or not context['all_docs']:
+            return None
+
+        top, score = context['all_docs'][0], context['scores'][0]
+        if score < self.min_score or not self.sentence_index.eligible(top.metadata):
+            return None
+
+        entry = self.sentence_index.get(doc_key(top.metadata))
+        if entry is None:
+            return None
+        sentences, vectors = entry
+
+        similarity = vectors @ np.asarray(query_vector, dtype=np.float32)
+        best = np.argsort(-similarity)[:self.max_sentences]
+        best = sorted(i for i in best if similarity[i] >= self.min_sentence_score)
+        if not best:
+            return None
+
+        return {
+            'answer': " ".join(sentences[i] for i in best),
+            'source': top.metadata.get('title'),
+            'score': score,
+        }
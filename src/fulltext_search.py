@@ -0,0 +1,56 @@
+from sqlalchemy import text
+from typing import List, Dict
+from src.data_loader import DataLoader
+
+
+class FullTextSearcher:
+    """
+    First-stage candidate generator backed by the MySQL FULLTEXT indexes
+    (ft_knowledgebase / ft_projects). Results are always fresh because they
+    come straight from the tables.
+    """
+
+    KB_QUERY = """
+    SELECT id, title, content, category, tags,
+           DATE_FORMAT(created_at, '%Y-%m-%d') as created_date,
+           MATCH(title, content, tags) AGAINST (:query IN NATURAL LANGUAGE MODE) AS score
+    FROM knowledgebase
+    WHERE MATCH(title, content, tags) AGAINST (:query IN NATURAL LANGUAGE MODE)
+    ORDER BY score DESC
+    LIMIT :limit
+    """
+
+    PROJECT_QUERY = """
+    SELECT id, project_name, description, tech_stack,
+           status, DATE_FORMAT(start_date, '%Y-%m-%d') as start_date,
+           metadata,
+           MATCH(project_name, description, tech_stack) AGAINST (:query IN NATURAL LANGUAGE MODE) AS score
+    FROM projects
+    WHERE MATCH(project_name, description, tech_stack) AGAINST (:query IN NATURAL LANGUAGE MODE)
+    ORDER BY score DESC
+    LIMIT :limit
+    """
+
+    def __init__(self, db_config):
+        self.db_config = db_config
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Return up to `limit` candidates per table as DataLoader-style dicts,
+        each with an extra 'lexical_score' (MySQL relevance).
+        """
+        params = {'query': query, 'limit': limit}
+        candidates = []
+
+        with self.db_config.engine.connect() as conn:
+            for row in conn.execute(text(self.KB_QUERY), params).fetchall():
+                doc = DataLoader.knowledgebase_row_to_doc(row)
+                doc['lexical_score'] = float(row[6])
+                candidates.append(doc)
+
+            for row in conn.execute(text(self.PROJECT_QUERY), params).fetchall():
+                doc = DataLoader.project_row_to_doc(row)
+                doc['lexical_score'] = float(row[7])
+                candidates.append(doc)
+
+        return candidates
@@ -0,0 +1,208 @@
+from typing import Dict
+import threading
+import time
+from src.vector_store import doc_key
+from src.dedup import choose_canonical
+
+
+EPOCH = "1970-01-01 00:00:00"
+
+
+def to_db_timestamp(value) -> str:
+    """Format a DB datetime the way watermarks are stored ('YYYY-MM-DD HH:MM:SS')"""
+    return value.strftime('%Y-%m-%d %H:%M:%S') if hasattr(value, 'strftime') else str(value)
+
+
+class IndexSyncWorker(threading.Thread):
+    """
+    Background change-data-capture loop that keeps the in-memory FAISS index
+    in step with MySQL without a restart.
+
+    Every `interval` seconds it polls both tables for rows whose `updated_at`
+    is at or after the index watermark and applies them with
+    VectorStoreManager.apply_changes (in place, under the index write lock).
+    Near-duplicate groups stay intact: a changed row that is a group's
+    canonical document or one of its `variants` re-chooses the group's
+    canonical document instead of being indexed alone. Deletes are
+    detected by diffing row keys every `delete_scan_every` polls. Once the
+    share of tombstoned vectors passes `compaction_threshold`, the index is
+    compacted on this thread.
+    """
+
+    def __init__(self, vector_store, data_loader, interval: float = 5.0, delete_scan_every: int = 12,
+                 compaction_threshold: float = 0.2):
+        super().__init__(name="index-sync", daemon=True)
+        self.vector_store = vector_store
+        self.data_loader = data_loader
+        self.interval = interval
+        self.delete_scan_every = delete_scan_every
+        self.compaction_threshold = compaction_threshold
+
+        self._stop_event = threading.Event()
+        self._polls = 0
+        # Rows already applied whose updated_at equals the watermark second
+        self._applied_at_watermark = set()
+
+        self.stats = {
+            'polls': 0,
+            'upserts': 0,
+            'deletes': 0,
+            'errors': 0,
+            'last_lag_seconds': None,
+            'max_lag_seconds': 0.0,
+            'last_sync_at': None,
+            'compactions': 0,
+        }
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sync_once()
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"✗ Index sync failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def sync_once(self) -> Dict:
+        """Poll once and apply any changes; returns counts of applied changes"""
+        started = time.time()
+        db_now = self.data_loader.current_timestamp()
+        watermark = self.vector_store.source_watermark or EPOCH
+        if self.vector_store.source_watermark is None and self._polls == 0:
+            print("⚠️  Index has no sync watermark (unversioned store?): "
+                  "the first sync re-embeds every row once to catch up")
+
+        changed = [
+            doc for doc in self.data_loader.load_changes(watermark)
+            if not (to_db_timestamp(doc['updated_at']) == watermark
+                    and doc_key(doc) in self._applied_at_watermark)
+        ]
+
+        deleted, promoted = [], []
+        if self._polls % self.delete_scan_every == 0:
+            db_keys = self.data_loader.load_keys()
+            deleted = sorted(self.vector_store.indexed_keys() - db_keys)
+            promoted = self._promote_variants(deleted, db_keys)
+        self._polls += 1
+        self.stats['polls'] += 1
+
+        if changed or deleted:
+            stamps = [doc.pop('updated_at') for doc in changed]
+            upserts, replaced = self._fold_variants(changed)
+            self.vector_store.apply_changes(upserts + promoted, deleted + replaced)
+
+            if stamps:
+                newest = max(stamps)
+                new_watermark = to_db_timestamp(newest)
+                if new_watermark != watermark:
+                    self._applied_at_watermark = set()
+                self._applied_at_watermark |= {
+                    doc_key(doc) for doc, stamp in zip(changed, stamps)
+                    if to_db_timestamp(stamp) == new_watermark
+                }
+                self.vector_store.source_watermark = new_watermark
+
+                # Commit-to-searchable lag, measured on the database clock.
+                # The first poll is a catch-up since the index was built, so it is not counted.
+                if self._polls > 1:
+                    lag = (db_now - min(stamps)).total_seconds() + (time.time() - started)
+                    self.stats['last_lag_seconds'] = lag
+                    self.stats['max_lag_seconds'] = max(self.stats['max_lag_seconds'], lag)
+
+            self.stats['upserts'] += len(changed)
+            self.stats['deletes'] += len(deleted)
+            print(f"✓ Index sync: {len(changed)} upserted, {len(deleted)} deleted "
+                  f"(lag {self.stats['last_lag_seconds'] or 0:.1f}s)")
+
+            if self.vector_store.compact(min_dead_ratio=self.compaction_threshold):
+                self.stats['compactions'] += 1
+
+        self.stats['last_sync_at'] = time.time()
+        return {'upserts': len(changed), 'deletes': len(deleted)}
+
+    def _fold_variants(self, changed):
+        """
+        Map changed rows onto their near-duplicate group, if they belong to
+        one: the group's canonical document is re-chosen from its current rows
+        (so it keeps its `variants`) and a variant row is never indexed on its
+        own. Returns (upserts, keys of canonical documents that were replaced).
+        """
+        groups = self.vector_store.variant_groups() if changed else {}
+        if not groups:
+            return changed, []
+        owners = {variant: canonical for canonical, variants in groups.items() for variant in variants}
+
+        upserts, affected = [], {}
+        for doc in changed:
+            key = doc_key(doc)
+            canonical = key if key in groups else owners.get(key)
+            if canonical is None:
+                upserts.append(doc)
+            else:
+                affected.setdefault(canonical, {})[key] = doc
+        if not affected:
+            return changed, []
+
+        missing = [k for canonical, docs in affected.items() for k in [canonical] + groups[canonical]
+                   if k not in docs]
+        rows = {doc_key(doc): doc for doc in self.data_loader.load_rows(missing)} if missing else {}
+        replaced = []
+        for canonical, docs in affected.items():
+            members = [docs.get(k) or rows.get(k) for k in [canonical] + groups[canonical]]
+            representative = choose_canonical([doc for doc in members if doc])
+            upserts.append(representative)
+            # A longer variant (or a deleted canonical row) moves the group to another key
+            if doc_key(representative) != canonical:
+                replaced.append(canonical)
+        return upserts, replaced
+
+    def _promote_variants(self, deleted, db_keys: set):
+        """
+        Near-duplicate rows folded into a deleted canonical document (its
+        `variants`, see NearDuplicateDetector) are not in the index; re-index
+        the surviving ones as a new canonical document.
+        """
+        groups = []
+        for key in deleted:
+            doc = self.vector_store.get_document(key)
+            survivors = [v for v in (doc.metadata.get('variants') or []) if v in db_keys] if doc else []
+            if survivors:
+                groups.append(survivors)
+        if not groups:
+            return []
+
+        rows = {doc_key(doc): doc for doc in self.data_loader.load_rows([k for group in groups for k in group])}
+        promoted = []
+        for group in groups:
+            docs = [rows[k] for k in group if k in rows]
+            if docs:
+                promoted.append(choose_canonical(docs))
+        if promoted:
+            print(f"✓ Index sync: promoted {len(promoted)} near-duplicate variants of deleted documents")
+        return promoted
+
+
+class SnapshotWatcher(threading.Thread):
+    """
+    Polls the vector store's CURRENT pointer every `interval` seconds and
+    hot-swaps snapshots published by another process (see
+    VectorStoreManager.reload_if_changed).
+    """
+
+    def __init__(self, vector_store, interval: float = 10.0):
+        super().__init__(name="snapshot-watcher", daemon=True)
+        self.vector_store = vector_store
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.vector_store.reload_if_changed()
+            except Exception as e:
+                print(f"✗ Snapshot reload failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,182 @@
+from langchain_ollama import OllamaLLM
+from typing import Callable, Dict, List, Optional, Tuple
+import urllib.request
+import itertools
+import threading
+import json
+import time
+from src.telemetry import telemetry
+
+
+class OllamaEndpoint:
+    """One generation server with a concurrency limit and health state"""
+
+    def __init__(self, base_url: str, max_concurrency: int = 4, overflow_concurrency: int = 2,
+                 temperature: float = 0.3, llm_factory: Optional[Callable] = None):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.temperature = temperature
+        # llm_factory(model) -> LangChain LLM; defaults to OllamaLLM against base_url
+        self.llm_factory = llm_factory or self._ollama_llm
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        # Extra slots reserved for the small fallback model when the endpoint is saturated
+        self._overflow_slots = threading.BoundedSemaphore(overflow_concurrency)
+        self._llms = {}
+        self._lock = threading.Lock()
+
+        self.healthy = True
+        # Monotonic time after which an unhealthy endpoint is given live traffic again
+        self.retry_at = 0.0
+        self.models = []
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+
+    def _ollama_llm(self, model: str):
+        return OllamaLLM(model=model, base_url=self.base_url, temperature=self.temperature)
+
+    def llm(self, model: str):
+        with self._lock:
+            if model not in self._llms:
+                self._llms[model] = self.llm_factory(model)
+            return self._llms[model]
+
+    def load(self) -> float:
+        return self.in_flight / self.max_concurrency
+
+    def try_acquire(self, overflow: bool = False) -> bool:
+        slots = self._overflow_slots if overflow else self._slots
+        if not slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self, overflow: bool = False) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        (self._overflow_slots if overflow else self._slots).release()
+
+    def check_health(self, timeout: float = 2.0) -> bool:
+        """Ping /api/tags; also records which models the server has pulled"""
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/api/tags", timeout=timeout) as response:
+                payload = json.loads(response.read().decode())
+            self.models = [m.get('name') for m in payload.get('models', [])]
+            self.healthy = True
+        except Exception:
+            self.healthy = False
+        return self.healthy
+
+
+class LLMBackendPool:
+    """
+    Routes generation requests across several Ollama endpoints.
+
+    strategy 'least_loaded' picks the healthy endpoint with the lowest
+    in-flight/limit ratio, 'round_robin' rotates. A request queues until a
+    slot frees up; when `fallback_model` is set and every endpoint is still
+    saturated after `acquire_timeout` seconds, it is served by that smaller
+    model on an overflow slot instead. Endpoints that raise are marked
+    unhealthy and get live traffic again after `retry_interval` seconds
+    (sooner if the background health checker sees them recover).
+    """
+
+    def __init__(self, endpoints: List[OllamaEndpoint], default_model: str, fallback_model: Optional[str] = None,
+                 strategy: str = "least_loaded", acquire_timeout: float = 2.0, health_check_interval: float = 30.0,
+                 retry_interval: float = 30.0):
+        if not endpoints:
+            raise ValueError("At least one LLM endpoint is required")
+        self.endpoints = endpoints
+        self.default_model = default_model
+        self.fallback_model = fallback_model
+        self.strategy = strategy
+        self.acquire_timeout = acquire_timeout
+        self.retry_interval = retry_interval
+        self._round_robin = itertools.count()
+
+        self._health_thread = None
+        if health_check_interval > 0:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(health_check_interval,), name="llm-health", daemon=True)
+            self._health_thread.start()
+
+    def _health_loop(self, interval: float) -> None:
+        while True:
+            for endpoint in self.endpoints:
+                endpoint.check_health()
+            time.sleep(interval)
+
+    def _ordered(self) -> List[OllamaEndpoint]:
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if e.healthy or now >= e.retry_at] or list(self.endpoints)
+        if self.strategy == "round_robin":
+            start = next(self._round_robin) % len(healthy)
+            return healthy[start:] + healthy[:start]
+        return sorted(healthy, key=lambda e: e.load())
+
+    def _acquire(self, overflow: bool = False) -> Optional[OllamaEndpoint]:
+        for endpoint in self._ordered():
+            if endpoint.try_acquire(overflow=overflow):
+                return endpoint
+        return None
+
+    def generate(self, prompt: str, model: Optional[str] = None, blocking: bool = True) -> Tuple[object, Dict]:
+        """
+        Generate with the requested (or default) model.
+        Returns (LangChain Generation, route info with endpoint/model/failover).
+        blocking=False is for optional work (e.g. query expansion): it only
+        takes a slot that is free right now and raises instead of queueing.
+        """
+        model = model or self.default_model
+        deadline = time.perf_counter() + self.acquire_timeout
+        attempted = set()
+        last_error = None
+
+        while True:
+            endpoint = self._acquire()
+            overflow = False
+            served_model = model
+
+            if endpoint is None:
+                # Past the timeout, saturation fails over to the small model if there is one
+                if self.fallback_model and model != self.fallback_model and time.perf_counter() >= deadline:
+                    endpoint = self._acquire(overflow=True)
+                    overflow = endpoint is not None
+                    served_model = self.fallback_model
+                if endpoint is None:
+                    if not blocking:
+                        raise RuntimeError("All LLM backends are busy")
+                    time.sleep(0.01)
+                    continue
+                telemetry.events.inc('llm_overload_failover')
+
+            endpoint.requests += 1
+            try:
+                result = endpoint.llm(served_model).generate([prompt])
+                endpoint.healthy = True
+                return result.generations[0][0], {
+                    'endpoint': endpoint.base_url,
+                    'model': served_model,
+                    'failover': served_model != model,
+                }
+            except Exception as e:
+                endpoint.failures += 1
+                endpoint.healthy = False
+                endpoint.retry_at = time.monotonic() + self.retry_interval
+                telemetry.events.inc('llm_endpoint_error')
+                attempted.add(endpoint.base_url)
+                last_error = e
+                if len(attempted) >= len(self.endpoints):
+                    raise RuntimeError(f"All LLM backends failed: {last_error}")
+            finally:
+                endpoint.release(overflow=overflow)
+
+    def stats(self) -> List[Dict]:
+        return [{
+            'endpoint': e.base_url,
+            'healthy': e.healthy,
+            'in_flight': e.in_flight,
+            'requests': e.requests,
+            'failures': e.failures,
+        } for e in self.endpoints]
@@ -0,0 +1,69 @@
+from typing import Dict, Tuple
+import threading
+
+
+class ModelRouter:
+    """
+    Picks the generation model per question from retrieval confidence.
+
+    A question whose best hit is both strong (similarity >= min_score) and
+    clearly ahead of the runner-up (margin >= min_margin) is effectively a
+    single-document lookup and goes to the fast small model; live structured
+    rows are explicit facts and go there too. Everything else (weak,
+    ambiguous or multi-source retrieval) escalates to the large model.
+    """
+
+    def __init__(self, small_model: str, large_model: str, min_score: float = 0.6, min_margin: float = 0.05):
+        self.small_model = small_model
+        self.large_model = large_model
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def choose(self, context: Dict) -> Tuple[str, str]:
+        """Return (model, reason)"""
+        if context.get('structured'):
+            return self.small_model, "structured rows"
+
+        scores = context.get('scores') or []
+        if not scores:
+            return self.large_model, "no retrieval hits"
+
+        top = scores[0]
+        runner_up = scores[1] if len(scores) > 1 else 0.0
+        if top < self.min_score:
+            return self.large_model, f"low confidence ({top:.2f})"
+        if top - runner_up < self.min_margin:
+            return self.large_model, f"ambiguous (margin {top - runner_up:.2f})"
+        return self.small_model, f"single-document hit ({top:.2f})"
+
+    def record(self, model: str, latency_seconds: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(model, {'requests': 0, 'total_seconds': 0.0})
+            stats['requests'] += 1
+            stats['total_seconds'] += latency_seconds
+
+    def report(self) -> Dict:
+        """
+        Per-model traffic share and mean generation latency, plus the estimated
+        average latency saved per request versus sending everything to the large model.
+        """
+        with self._lock:
+            total = sum(s['requests'] for s in self._stats.values())
+            models = {
+                model: {
+                    'requests': s['requests'],
+                    'share': round(s['requests'] / total, 3) if total else 0.0,
+                    'avg_latency_ms': round(1000 * s['total_seconds'] / s['requests'], 1),
+                }
+                for model, s in self._stats.items()
+            }
+
+        small = models.get(self.small_model)
+        large = models.get(self.large_model)
+        saved = None
+        if small and large:
+            saved = round((large['avg_latency_ms'] - small['avg_latency_ms']) * small['share'], 1)
+
+        return {'requests': total, 'models': models, 'avg_latency_saved_ms': saved}
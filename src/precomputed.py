@@ -0,0 +1,157 @@
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+import threading
+import re
+from src.query_log import read_records
+
+
+def normalize_question(question: str) -> str:
+    """Case/whitespace/punctuation-insensitive key, so "How do I reset X?" == "how do i reset x" """
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+def top_questions(log_path: str, n: int, min_count: int = 2) -> List[str]:
+    """
+    Most frequent normalized standalone questions in a QueryLog directory
+    or a JSONL trace log (telemetry's TRACE_LOG). Background requests are ignored.
+    """
+    counts = Counter()
+    for record in read_records(log_path):
+        if record.get('background'):
+            continue
+        question = record.get('standalone') or record.get('question')
+        if question:
+            counts[normalize_question(question)] += 1
+
+    return [question for question, count in counts.most_common(n) if count >= min_count]
+
+
+class PrecomputedAnswers:
+    """
+    Lookup table of ready answers for the most frequent questions.
+
+    `refresh_async` regenerates the answers in a background thread against
+    the current index and swaps the whole table in at the end, so requests
+    see either the old or the new answers, never a mix. Registered as a
+    VectorStoreManager swap listener (`on_index_swap`), it drops answers
+    built from changed rows and re-answers them in the background; a
+    reloaded index triggers a full refresh. Rows that change while a refresh
+    is running are checked against its answers before they are installed.
+    Answers that used live structured rows are never cached.
+    """
+
+    def __init__(self, top_n: int = 50, min_count: int = 2):
+        self.top_n = top_n
+        self.min_count = min_count
+        self._answers = {}
+        self._answer_fn = None
+        self._log_path = None
+        # Background work queued for the single refresh thread
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pending_full = False
+        self._pending = set()
+        # Index changes seen while the current batch was being answered
+        self._changed = set()
+        self._replaced = False
+
+    def lookup(self, question: str) -> Optional[Dict]:
+        return self._answers.get(normalize_question(question))
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    @staticmethod
+    def _answer_all(answer_fn: Callable[[str], Dict], questions: List[str]) -> Dict[str, Dict]:
+        answers = {}
+        for question in questions:
+            try:
+                result = answer_fn(question)
+            except Exception as e:
+                print(f"✗ Precomputing answer failed for '{question}': {e}")
+                continue
+            # Live project rows must stay live; don't freeze them into the table
+            if not result['sources_used'].get('structured'):
+                answers[normalize_question(question)] = result
+        return answers
+
+    def refresh(self, answer_fn: Callable[[str], Dict], questions: List[str]) -> int:
+        """Answer every question with answer_fn(question) and replace the table"""
+        self._answers = self._answer_all(answer_fn, questions)
+        return len(self._answers)
+
+    def refresh_async(self, answer_fn: Callable[[str], Dict], log_path: str) -> Optional[threading.Thread]:
+        """Refresh from the top questions of the query log without blocking startup"""
+        self._answer_fn = answer_fn
+        self._log_path = log_path
+        return self._schedule(None)
+
+    def on_index_swap(self, changed_keys: Optional[set]) -> None:
+        """Drop answers the index change made stale and re-answer them in the background"""
+        if self._answer_fn is None:
+            return
+        with self._lock:
+            # A batch being answered may predate this change (see _run)
+            if self._worker is not None:
+                if changed_keys is None:
+                    self._replaced = True
+                else:
+                    self._changed |= changed_keys
+
+            if changed_keys is None:
+                self._answers = {}
+                stale = None
+            else:
+                answers = self._answers
+                stale = [q for q, answer in answers.items() if self._is_stale(answer, changed_keys)]
+                if not stale:
+                    return
+                self._answers = {q: answer for q, answer in answers.items() if q not in stale}
+        self._schedule(stale)
+
+    @staticmethod
+    def _is_stale(answer: Dict, changed_keys: set) -> bool:
+        return bool(changed_keys.intersection(answer.get('source_keys', ())))
+
+    def _schedule(self, questions: Optional[List[str]]) -> Optional[threading.Thread]:
+        """Queue a full (None) or partial refresh; one thread works through the queue"""
+        with self._lock:
+            if questions is None:
+                self._pending_full = True
+            else:
+                self._pending.update(questions)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="precompute-answers", daemon=True)
+                self._worker.start()
+            return self._worker
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                full, questions = self._pending_full, list(self._pending)
+                self._pending_full, self._pending = False, set()
+                if not full and not questions:
+                    self._worker = None
+                    return
+                self._changed, self._replaced = set(), False
+
+            if full:
+                questions = top_questions(self._log_path, self.top_n, self.min_count)
+                if not questions:
+                    continue
+            fresh = self._answer_all(self._answer_fn, questions)
+
+            # Installed under the lock, so a change lands either before (checked here)
+            # or after (on_index_swap invalidates the new table)
+            with self._lock:
+                if self._replaced:
+                    # Whole index replaced meanwhile; a full refresh is already queued
+                    continue
+                stale = [q for q, answer in fresh.items() if self._is_stale(answer, self._changed)]
+                for q in stale:
+                    del fresh[q]
+                self._pending.update(stale)
+                self._answers = fresh if full else {**self._answers, **fresh}
+            if full:
+                print(f"\n✓ Precomputed answers for {len(fresh)} frequent questions")
@@ -0,0 +1,155 @@
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+import itertools
+import threading
+import re
+from src.telemetry import telemetry
+
+
+class QueryExpander:
+    """
+    Reformulates short or vague questions into a few search variants.
+
+    Variants come from a term dictionary derived from the knowledgebase
+    `tags` column: tags that co-occur on at least `min_cooccurrence` rows are
+    treated as related, so "kiosk offline" also searches with the tags that
+    usually accompany "kiosk". The dictionary is built up front and rebuilt
+    from VectorStoreManager's swap hook (`on_index_swap`), never on a request.
+
+    Optionally `llm_generate(prompt) -> text` (a small local model, called
+    without queueing for a slot) adds paraphrases for short questions the
+    tags don't cover. At most `max_llm_in_flight` paraphrase calls run at a
+    time; beyond that, questions are searched unexpanded. A request waits
+    `llm_budget_ms` for them, and a late answer is cached for the next time
+    the question is asked. Expansions are cached (LRU) until the next rebuild.
+    """
+
+    def __init__(self, vector_store_manager, max_variants: int = 3, min_cooccurrence: int = 2,
+                 llm_generate: Optional[Callable[[str], str]] = None, llm_budget_ms: float = 150,
+                 max_llm_in_flight: int = 1, short_query_words: int = 6, cache_size: int = 10000):
+        self.vector_store = vector_store_manager
+        self.max_variants = max_variants
+        self.min_cooccurrence = min_cooccurrence
+        self.llm_generate = llm_generate
+        self.llm_budget_ms = llm_budget_ms
+        self.short_query_words = short_query_words
+        self.cache_size = cache_size
+
+        self._related = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        # Bounds LLM work (running + queued) to the executor's workers
+        self._llm_slots = threading.BoundedSemaphore(max_llm_in_flight)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_llm_in_flight, thread_name_prefix="query-expansion") if llm_generate else None
+
+        if self.vector_store.vector_store:
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        """Rebuild the related-tag dictionary from the live index and drop cached expansions"""
+        with self._build_lock:
+            pair_counts = Counter()
+            for doc in self.vector_store.live_documents():
+                tags = sorted({t.strip().lower() for t in str(doc.metadata.get('tags') or '').split(',') if t.strip()})
+                pair_counts.update(itertools.permutations(tags, 2))
+
+            related = defaultdict(list)
+            for (tag, other), count in pair_counts.most_common():
+                if count >= self.min_cooccurrence:
+                    related[tag].append(other)
+            self._related = {
+                tag: (re.compile(rf"\b{re.escape(tag)}\b"), others[:2]) for tag, others in related.items()
+            }
+            with self._lock:
+                self._cache.clear()
+
+    def on_index_swap(self, changed_keys: Optional[set]) -> None:
+        """VectorStoreManager swap listener: tags may have changed unless the swap was a compaction"""
+        if changed_keys is None or changed_keys:
+            self.rebuild()
+
+    def _dictionary_variants(self, query: str) -> List[str]:
+        q = query.lower()
+        variants = []
+        for tag, (pattern, others) in self._related.items():
+            extra = [other for other in others if other not in q]
+            if extra and pattern.search(q):
+                variants.append(f"{query} {' '.join(extra)}")
+        return variants
+
+    def _llm_variants(self, query: str) -> List[str]:
+        prompt = (
+            f"Rewrite this IT support question as {self.max_variants - 1} different, more specific "
+            f"search queries, one per line, no numbering:\n\n{query}\n\nQueries:"
+        )
+        try:
+            text = self.llm_generate(prompt)
+        finally:
+            self._llm_slots.release()
+        lines = [line.strip(" -*\t0123456789.") for line in text.splitlines()]
+        return [line for line in lines if line and line.lower() != query.lower()]
+
+    def _remember(self, key: str, variants: List[str]) -> None:
+        with self._lock:
+            self._cache[key] = variants
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def expand(self, query: str) -> List[str]:
+        """Return [query, variant, ...] with at most `max_variants` entries"""
+        key = " ".join(query.lower().split())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            telemetry.events.inc('query_expansion_cache_hit')
+            return cached
+
+        variants = self._dictionary_variants(query)
+        complete = True
+        if self._executor and not variants and len(query.split()) <= self.short_query_words:
+            if not self._llm_slots.acquire(blocking=False):
+                # Paraphrase calls already at the cap: search unexpanded rather than queue
+                complete = False
+                telemetry.events.inc('query_expansion_skipped')
+            else:
+                future = self._executor.submit(self._llm_variants, query)
+                done = threading.Event()
+                future.add_done_callback(lambda _: done.set())
+                finished = done.wait(self.llm_budget_ms / 1000)
+                if finished and not future.exception():
+                    variants = future.result()
+                elif finished:
+                    # Failed or no free LLM slot: try again next time the question is asked
+                    complete = False
+                    telemetry.events.inc('query_expansion_failed')
+                elif future.cancel():
+                    # Never started: drop it and free its slot
+                    self._llm_slots.release()
+                    complete = False
+                    telemetry.events.inc('query_expansion_budget_exceeded')
+                else:
+                    # Over budget: search with the original only; cache the paraphrases when they arrive
+                    complete = False
+                    telemetry.events.inc('query_expansion_budget_exceeded')
+                    future.add_done_callback(
+                        lambda f: f.exception() or self._remember(key, ([query] + f.result())[:self.max_variants]))
+
+        expanded = list(dict.fromkeys([query] + variants))[:self.max_variants]
+        if complete:
+            self._remember(key, expanded)
+        return expanded
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> Dict[str, float]:
+    """RRF: each ranking contributes 1 / (k + rank) for every key it contains"""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            fused[key] += 1.0 / (k + rank)
+    return fused
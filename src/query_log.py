@@ -0,0 +1,110 @@
+from typing import Dict, Iterator, Optional
+import threading
+import queue
+import gzip
+import json
+import glob
+import time
+import os
+from src.telemetry import telemetry
+
+
+class QueryLog(threading.Thread):
+    """
+    Append-only, rotating, gzip-compressed JSONL log of answered questions.
+
+    `log()` only enqueues (never blocks; records are dropped and counted
+    when the queue is full), and a background thread writes batches as
+    separate gzip members appended to the current file. Concatenated
+    members are a valid gzip stream, so files stay readable after a crash
+    mid-run. Files rotate at `max_file_bytes` and only the newest
+    `max_files` are kept.
+    """
+
+    FILE_PATTERN = "queries-*.jsonl.gz"
+
+    def __init__(self, directory: str, max_file_bytes: int = 64 * 1024 * 1024, max_files: int = 30,
+                 queue_size: int = 10000, flush_interval: float = 1.0, batch_size: int = 500):
+        super().__init__(name="query-log", daemon=True)
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._path = None
+        self.stats = {'written': 0, 'dropped': 0, 'files': 0}
+
+        os.makedirs(directory, exist_ok=True)
+
+    def log(self, record: Dict) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            telemetry.events.inc('query_log_dropped')
+
+    def run(self):
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    print(f"✗ Query log write failed: {e}")
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush what is queued and stop the writer"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def _write(self, batch) -> None:
+        if self._path is None or os.path.getsize(self._path) >= self.max_file_bytes:
+            self._rotate()
+        payload = "".join(json.dumps(record, default=str) + "\n" for record in batch)
+        with open(self._path, 'ab') as f:
+            f.write(gzip.compress(payload.encode('utf-8')))
+        self.stats['written'] += len(batch)
+
+    def _rotate(self) -> None:
+        self._path = os.path.join(self.directory, time.strftime("queries-%Y%m%d-%H%M%S.jsonl.gz"))
+        open(self._path, 'ab').close()
+        self.stats['files'] += 1
+
+        files = sorted(glob.glob(os.path.join(self.directory, self.FILE_PATTERN)))
+        for old in files[:-self.max_files]:
+            os.remove(old)
+
+
+def read_records(path: str, since: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Iterate records from a QueryLog directory (oldest file first) or a single
+    JSONL / JSONL.gz file such as telemetry's TRACE_LOG.
+    """
+    if not path or not os.path.exists(path):
+        return
+    paths = sorted(glob.glob(os.path.join(path, QueryLog.FILE_PATTERN))) if os.path.isdir(path) else [path]
+
+    for file_path in paths:
+        opener = gzip.open if file_path.endswith('.gz') else open
+        try:
+            with opener(file_path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if since is None or record.get('ts', 0) >= since:
+                        yield record
+        except (EOFError, OSError) as e:
+            # A torn final member after a crash; everything before it was read
+            print(f"✗ Stopped reading {file_path}: {e}")
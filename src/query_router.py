@@ -0,0 +1,139 @@
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+import numpy as np
+import threading
+import time
+import re
+from src.structured_query import PRODUCT_LINES
+
+
+class SemanticRouter:
+    """
+    Narrows a query to the slice of the index it is about before FAISS runs.
+
+    Two signals, both built from the live index (no extra embedding):
+    - a term dictionary from the knowledgebase `tags` column plus the
+      product lines, mapping each distinctive term to the rows carrying it;
+      a query that names a term is restricted to those rows (when several
+      terms match, per-term centroids keep the ones closest to the query);
+    - a centroid per source (knowledgebase / projects); when the query is
+      clearly closer to one (by `source_margin`), only that source is searched.
+
+    route() returns None when neither signal is confident, and the caller
+    searches everything.
+
+    The dictionary and centroids are built when the router is created and
+    rebuilt from VectorStoreManager's swap hook (`on_index_swap`, at most
+    once per `rebuild_interval` seconds), never on a request thread.
+    """
+
+    def __init__(self, vector_store_manager, source_margin: float = 0.1, tag_margin: float = 0.05,
+                 max_term_share: float = 0.3, rebuild_interval: float = 60.0):
+        self.vector_store = vector_store_manager
+        self.source_margin = source_margin
+        self.tag_margin = tag_margin
+        # Tags on more than this share of rows don't narrow anything (product lines are exempt)
+        self.max_term_share = max_term_share
+        self.rebuild_interval = rebuild_interval
+        self._state = None
+        self._built_at = 0.0
+        self._build_lock = threading.Lock()
+        self._rebuild_timer = None
+
+        if self.vector_store.vector_store:
+            self.rebuild()
+
+    @staticmethod
+    def _terms(metadata: Dict) -> Set[str]:
+        terms = {t.strip().lower() for t in str(metadata.get('tags') or '').split(',') if len(t.strip()) > 2}
+        title = str(metadata.get('title') or metadata.get('project_name') or '').lower()
+        terms.update(p for p in PRODUCT_LINES if p in title or p in terms)
+        return terms
+
+    def rebuild(self) -> None:
+        """Rebuild terms and centroids from the live index (index writers wait, searches don't)"""
+        with self._build_lock:
+            self._rebuild_timer = None
+            with self.vector_store.frozen() as store:
+                self._state = self._build(store)
+            self._built_at = time.time()
+
+    def on_index_swap(self, changed_keys: Optional[set]) -> None:
+        """VectorStoreManager swap listener; compactions only move positions, which the state doesn't hold"""
+        if changed_keys is not None and not changed_keys:
+            return
+        wait = self._built_at + self.rebuild_interval - time.time()
+        if wait <= 0:
+            self.rebuild()
+            return
+        with self._build_lock:
+            if self._rebuild_timer is None:
+                self._rebuild_timer = threading.Timer(wait, self.rebuild)
+                self._rebuild_timer.daemon = True
+                self._rebuild_timer.start()
+
+    def _build(self, store):
+        positions = self.vector_store._positions(store)
+        keys = list(positions)
+        if not keys:
+            return {}, {}, {}, {}, {}
+
+        try:
+            all_vectors = store.index.reconstruct_n(0, store.index.ntotal)
+            matrix = all_vectors[[positions[key] for key in keys]]
+        except RuntimeError:
+            matrix = np.vstack([store.index.reconstruct(int(positions[key])) for key in keys])
+        row = {key: i for i, key in enumerate(keys)}
+
+        source_keys, term_keys = defaultdict(set), defaultdict(set)
+        for key, position in positions.items():
+            metadata = store.docstore.search(store.index_to_docstore_id[position]).metadata
+            source_keys[metadata.get('source')].add(key)
+            for term in self._terms(metadata):
+                term_keys[term].add(key)
+
+        max_rows = max(1, int(self.max_term_share * len(keys)))
+        term_keys = {term: members for term, members in term_keys.items()
+                     if len(members) <= max_rows or term in PRODUCT_LINES}
+
+        def centroid(members):
+            vector = matrix[[row[key] for key in members]].mean(axis=0)
+            return vector / (np.linalg.norm(vector) or 1.0)
+
+        patterns = {term: re.compile(rf"\b{re.escape(term)}\b") for term in term_keys}
+        return (
+            dict(source_keys), {source: centroid(members) for source, members in source_keys.items()},
+            term_keys, {term: centroid(members) for term, members in term_keys.items()},
+            patterns,
+        )
+
+    def route(self, query: str, query_vector) -> Tuple[Optional[Set[str]], str]:
+        """Return (row keys to search or None for everything, route label)"""
+        if self._state is None:
+            return None, "all"
+        source_keys, source_centroids, term_keys, term_centroids, patterns = self._state
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        q = query.lower()
+
+        tag_subset, tag_label = None, None
+        matched = [term for term, pattern in patterns.items() if pattern.search(q)]
+        if matched:
+            similarity = {term: float(term_centroids[term] @ query_vector) for term in matched}
+            best = max(similarity.values())
+            kept = sorted(term for term in matched if similarity[term] >= best - self.tag_margin)
+            tag_subset = set().union(*(term_keys[term] for term in kept))
+            tag_label = "tag:" + "+".join(kept)
+
+        source_subset, source_label = None, None
+        if len(source_centroids) > 1:
+            ranked = sorted(((float(c @ query_vector), s) for s, c in source_centroids.items()), reverse=True)
+            if ranked[0][0] - ranked[1][0] >= self.source_margin:
+                source_subset, source_label = source_keys[ranked[0][1]], f"source:{ranked[0][1]}"
+
+        if tag_subset is not None and source_subset is not None and tag_subset & source_subset:
+            return tag_subset & source_subset, f"{source_label},{tag_label}"
+        if tag_subset is not None:
+            return tag_subset, tag_label
+        if source_subset is not None:
+            return source_subset, source_label
+        return None, "all"
@@ -0,0 +1,68 @@
+from langchain_core.documents import Document
+from collections import OrderedDict
+from typing import List
+import threading
+import time
+from src.vector_store import doc_key
+from src.telemetry import telemetry
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores (query, passage) pairs with a small CPU cross-encoder.
+
+    Candidates are scored in batches in bi-encoder order until the latency
+    budget is spent; anything left unscored keeps its original order after
+    the scored ones. Pair scores are cached (LRU) so repeated questions skip
+    the model entirely.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 batch_size: int = 16, max_latency_ms: float = 300, cache_size: int = 10000):
+        from sentence_transformers import CrossEncoder
+
+        print(f"Initializing re-ranker model: {model_name}")
+        self.model = CrossEncoder(model_name, device="cpu", max_length=256)
+        self.batch_size = batch_size
+        self.max_latency_ms = max_latency_ms
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _cache_key(self, query: str, doc: Document):
+        # Content hash so an updated row is re-scored
+        return (query.strip().lower(), doc_key(doc.metadata), hash(doc.page_content))
+
+    def rerank(self, query: str, docs: List[Document], top_k: int) -> List[Document]:
+        """Return the top_k documents by cross-encoder score"""
+        deadline = time.perf_counter() + self.max_latency_ms / 1000
+        cache_keys = [self._cache_key(query, doc) for doc in docs]
+
+        scores = {}
+        with self._cache_lock:
+            for i, key in enumerate(cache_keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+
+        telemetry.events.inc('rerank_cache_hit', len(scores))
+        pending = [i for i in range(len(docs)) if i not in scores]
+        for start in range(0, len(pending), self.batch_size):
+            if time.perf_counter() > deadline:
+                telemetry.events.inc('rerank_budget_exhausted')
+                break
+            batch = pending[start:start + self.batch_size]
+            batch_scores = self.model.predict(
+                [(query, docs[i].page_content) for i in batch],
+                batch_size=len(batch)
+            )
+            with self._cache_lock:
+                for i, score in zip(batch, batch_scores):
+                    scores[i] = float(score)
+                    self._cache[cache_keys[i]] = float(score)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        scored = sorted(scores, key=lambda i: scores[i], reverse=True)
+        unscored = [i for i in range(len(docs)) if i not in scores]
+        return [docs[i] for i in (scored + unscored)[:top_k]]
@@ -1,31 +1,247 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
+from langchain_core.documents import Document
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from src.structured_query import StructuredQueryEngine
+from src.fulltext_search import FullTextSearcher
+from src.vector_store import doc_key, to_document
+from src.query_expansion import reciprocal_rank_fusion
+from src.telemetry import telemetry
+
+
+def mmr_select(query_similarity: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """
+    Maximal marginal relevance over a candidate matrix (rows L2-normalized).
+    Picks k indices, each maximizing
+    lambda * sim(query, d) - (1 - lambda) * max sim(d, already selected);
+    the redundancy term is updated with one matrix-vector product per pick.
+    """
+    n = len(query_similarity)
+    k = min(k, n)
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected = []
+
+    for _ in range(k):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = lambda_mult * query_similarity - (1 - lambda_mult) * penalty
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, vectors @ vectors[best])
+
+    return selected
+
 
 class AdvancedRetriever:
-    def __init__(self, vector_store_manager, db_config):
+    def __init__(self, vector_store_manager, db_config, mode: str = 'dense', hybrid_alpha: float = 0.7,
+                 reranker=None, rerank_candidates: int = 20, min_score: float = 0.0,
+                 mmr_lambda: float = None, mmr_fetch_k: int = 20, router=None, expander=None):
+        """
+        mode: 'dense' searches FAISS directly; 'fulltext' gets candidates from
+        MySQL MATCH ... AGAINST and re-ranks them with the dense embeddings.
+        hybrid_alpha: weight of the dense score vs. the lexical score in 'fulltext' mode.
+        reranker: optional CrossEncoderReranker; when set, `rerank_candidates`
+        documents are fetched and re-scored down to k.
+        min_score: best dense similarity a query needs to count as answerable;
+        below it (and with no structured rows) the context is flagged
+        `low_confidence` so the chatbot can skip generation. 0 disables the gate.
+        mmr_lambda: when set, `mmr_fetch_k` candidates are fetched and reduced
+        with maximal marginal relevance (1.0 = pure relevance, lower = more
+        diverse) before the re-ranker or the final k.
+        router: optional SemanticRouter; in 'dense' mode it narrows the FAISS
+        search to the rows of the product line / source the query is about,
+        falling back to the full index when the subset yields too few hits.
+        expander: optional QueryExpander; in 'dense' mode the query and its
+        reformulations are searched as one batch and fused with reciprocal
+        rank fusion (takes precedence over the router).
+        """
         self.vector_store = vector_store_manager
         self.db_config = db_config
-    
-    def retrieve_context(self, query: str, k: int = 5) -> Dict:
-        # Get similar documents
-        docs = self.vector_store.similarity_search(query, k=k)
-        
+        self.mode = mode
+        self.hybrid_alpha = hybrid_alpha
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.min_score = min_score
+        self.mmr_lambda = mmr_lambda
+        self.mmr_fetch_k = mmr_fetch_k
+        self.router = router
+        self.expander = expander
+        self.structured = StructuredQueryEngine(db_config)
+        self.fulltext = FullTextSearcher(db_config)
+
+    def retrieve_context(self, query: str, k: int = 5, query_vector=None) -> Dict:
+        # Get similar documents (over-fetch when a re-ranker picks the final k)
+        keep_k = max(k, self.rerank_candidates) if self.reranker else k
+        fetch_k = max(keep_k, self.mmr_fetch_k) if self.mmr_lambda is not None else keep_k
+        if self.mode == 'fulltext':
+            scored = self.fulltext_search(query, k=fetch_k, query_vector=query_vector)
+        elif self.expander:
+            scored = self.expanded_search(query, fetch_k, query_vector)
+        elif self.router:
+            scored = self.routed_search(query, fetch_k, query_vector)
+        else:
+            scored = self.vector_store.similarity_search_with_scores(query, k=fetch_k, query_vector=query_vector)
+
+        docs = [doc for doc, _ in scored]
+        similarity = {id(doc): score for doc, score in scored}
+
+        if self.mmr_lambda is not None and len(scored) > keep_k:
+            with telemetry.stage('mmr'):
+                docs = self.diversify(scored, keep_k)
+
+        if self.reranker:
+            with telemetry.stage('rerank'):
+                docs = self.reranker.rerank(query, docs, top_k=k)
+
         # Organize by valid sources (tickets removed)
         context = {
             'knowledgebase': [],
             'projects': [],
-            'all_docs': docs
+            'structured': [],
+            'all_docs': docs,
+            # Dense cosine similarity of each doc in all_docs (retrieval confidence signal)
+            'scores': [similarity[id(doc)] for doc in docs]
         }
-        
+
         for doc in docs:
             source = doc.metadata.get('source', 'unknown')
-            
+
             if source in context:
                 context[source].append(doc)
-        
+
+        # Exact project questions are answered from live rows
+        structured_docs = self.retrieve_structured(query)
+        if structured_docs:
+            live_ids = {doc.metadata.get('id') for doc in structured_docs}
+            context['structured'] = structured_docs
+            context['projects'] = structured_docs + [
+                doc for doc in context['projects']
+                if doc.metadata.get('id') not in live_ids
+            ]
+
+        best = max(context['scores'], default=0.0)
+        context['low_confidence'] = not structured_docs and (not docs or best < self.min_score)
+
         return context
+
+    def expanded_search(self, query: str, k: int, query_vector=None) -> List[Tuple[Document, float]]:
+        """
+        Search the query and its expansions in one batch and merge the ranked
+        lists with RRF. Each document keeps its best dense similarity across
+        the variants, so the confidence gate and model router see cosine scores.
+        """
+        with telemetry.stage('query_expansion'):
+            variants = self.expander.expand(query)
+        if len(variants) == 1:
+            return self.vector_store.similarity_search_with_scores(query, k=k, query_vector=query_vector)
+
+        telemetry.events.inc('query_expanded')
+        with telemetry.stage('query_embedding'):
+            if query_vector is None:
+                vectors = self.vector_store.embed_queries(variants)
+            else:
+                vectors = [query_vector] + list(self.vector_store.embed_queries(variants[1:]))
+        batches = self.vector_store.similarity_search_batch(variants, k=k, query_vectors=vectors)
+
+        best = {}
+        for results in batches:
+            for doc, score in results:
+                key = doc_key(doc.metadata)
+                if key not in best or score > best[key][1]:
+                    best[key] = (doc, score)
+        fused = reciprocal_rank_fusion([[doc_key(doc.metadata) for doc, _ in results] for results in batches])
+        return [best[key] for key in sorted(fused, key=fused.get, reverse=True)[:k]]
+
+    def routed_search(self, query: str, k: int, query_vector=None) -> List[Tuple[Document, float]]:
+        """Dense search restricted to the subset chosen by the router"""
+        if query_vector is None:
+            with telemetry.stage('query_embedding'):
+                query_vector = self.vector_store.embed_query(query)
+
+        with telemetry.stage('route_query'):
+            subset, label = self.router.route(query, query_vector)
+
+        if subset is not None:
+            scored = self.vector_store.similarity_search_with_scores(
+                query, k=k, query_vector=query_vector, subset_keys=subset)
+            if len(scored) >= k:
+                telemetry.events.inc('query_routed')
+                return scored
+            telemetry.events.inc('query_route_fallback')
+
+        return self.vector_store.similarity_search_with_scores(query, k=k, query_vector=query_vector)
+
+    def diversify(self, scored: List[Tuple[Document, float]], k: int) -> List[Document]:
+        """MMR over the candidates' stored vectors (only rows missing from the index are embedded)"""
+        docs = [doc for doc, _ in scored]
+        keys = [doc_key(doc.metadata) for doc in docs]
+
+        vectors = self.vector_store.get_vectors(keys)
+        missing = [i for i, key in enumerate(keys) if key not in vectors]
+        if missing:
+            fresh = self.vector_store.embed_texts([docs[i].page_content for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[keys[i]] = vector
+
+        matrix = np.vstack([vectors[key] for key in keys]).astype(np.float32)
+        relevance = np.array([score for _, score in scored], dtype=np.float32)
+        return [docs[i] for i in mmr_select(relevance, matrix, k, self.mmr_lambda)]
+
+    def fulltext_search(self, query: str, k: int = 5, candidate_k: int = None,
+                        query_vector=None) -> List[Tuple[Document, float]]:
+        """
+        Lexical candidates from MySQL, re-ranked with dense similarity.
+        Returns (document, dense cosine similarity) pairs in hybrid-score order.
+        """
+        if self.db_config is None:
+            return self.vector_store.similarity_search_with_scores(query, k=k, query_vector=query_vector)
+        try:
+            with telemetry.stage('fulltext_search'):
+                candidates = self.fulltext.search(query, limit=candidate_k or k * 4)
+        except Exception as e:
+            print(f"✗ Full-text search failed: {e}")
+            candidates = []
+
+        if not candidates:
+            return self.vector_store.similarity_search_with_scores(query, k=k, query_vector=query_vector)
+
+        keys = [doc_key(doc) for doc in candidates]
+        if query_vector is None:
+            with telemetry.stage('query_embedding'):
+                query_vector = self.vector_store.embed_query(query)
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+
+        # Reuse indexed vectors; only rows newer than the index are embedded here
+        vectors = self.vector_store.get_vectors(keys)
+        missing = [i for i, key in enumerate(keys) if key not in vectors]
+        if missing:
+            fresh = self.vector_store.embed_texts([candidates[i]['text'] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[keys[i]] = vector
+
+        dense = np.vstack([vectors[key] for key in keys]) @ query_vector
+        lexical = np.array([doc.pop('lexical_score') for doc in candidates], dtype=np.float32)
+        if lexical.max() > 0:
+            lexical = lexical / lexical.max()
+
+        scores = self.hybrid_alpha * dense + (1 - self.hybrid_alpha) * lexical
+        order = np.argsort(-scores)[:k]
+
+        return [(to_document(candidates[i]), float(dense[i])) for i in order]
+
+    def retrieve_structured(self, query: str) -> List:
+        """Live SQL lookup for structured project intents (falls back to vector-only on DB errors)"""
+        if self.db_config is None:
+            return []
+        try:
+            with telemetry.stage('structured_lookup'):
+                return self.structured.search(query)
+        except Exception as e:
+            print(f"✗ Structured lookup failed: {e}")
+            return []
     
 
 
@@ -0,0 +1,245 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+import numpy as np
+import threading
+import sqlite3
+import json
+import time
+from src.conversation import ConversationMemory
+
+
+# Fixed per-record overhead (objects, dict slots) added to the measured payload
+RECORD_OVERHEAD_BYTES = 512
+
+
+class SessionRecord:
+    """Compact per-session state: conversation memory, last retrieved docs, cached query embeddings"""
+
+    __slots__ = ('session_id', 'memory', 'last_doc_keys', 'query_embeddings', 'embedding_version',
+                 'last_access', 'size_bytes', 'lock')
+
+    MAX_CACHED_EMBEDDINGS = 8
+
+    def __init__(self, session_id: str, memory: ConversationMemory):
+        self.session_id = session_id
+        self.memory = memory
+        self.last_doc_keys = ()
+        # question -> float16 embedding (half the memory; plenty for re-use as a query)
+        self.query_embeddings = OrderedDict()
+        # VectorStoreManager.embedding_version the cached embeddings were computed with
+        self.embedding_version = 0
+        self.last_access = time.time()
+        self.size_bytes = 0
+        # Held for a whole request so one conversation's turns are applied in order
+        self.lock = threading.Lock()
+
+    def cached_embedding(self, question: str, version: int = 0) -> Optional[np.ndarray]:
+        if version != self.embedding_version:
+            # Embedding function changed (e.g. new PCA basis): cached vectors are unusable
+            self.query_embeddings.clear()
+            self.embedding_version = version
+            return None
+        vector = self.query_embeddings.get(question)
+        return vector.astype(np.float32) if vector is not None else None
+
+    def cache_embedding(self, question: str, vector, version: int = 0) -> None:
+        if version != self.embedding_version:
+            self.query_embeddings.clear()
+            self.embedding_version = version
+        self.query_embeddings[question] = np.asarray(vector, dtype=np.float16)
+        while len(self.query_embeddings) > self.MAX_CACHED_EMBEDDINGS:
+            self.query_embeddings.popitem(last=False)
+
+    def measure(self) -> int:
+        memory = self.memory
+        text_bytes = len(memory.summary) + len(memory.last_standalone or "")
+        text_bytes += sum(len(q) + len(a) for q, a in memory.turns)
+        text_bytes += sum(len(k) for k in self.last_doc_keys)
+        vector_bytes = sum(len(q) + v.nbytes for q, v in self.query_embeddings.items())
+        self.size_bytes = RECORD_OVERHEAD_BYTES + text_bytes + vector_bytes
+        return self.size_bytes
+
+    def to_json(self) -> str:
+        # Embedding cache is not spilled; it is cheap to rebuild
+        return json.dumps({
+            'turns': list(self.memory.turns),
+            'summary': self.memory.summary,
+            'last_standalone': self.memory.last_standalone,
+            'last_doc_keys': list(self.last_doc_keys),
+        })
+
+    @classmethod
+    def from_json(cls, session_id: str, data: str, memory: ConversationMemory) -> 'SessionRecord':
+        state = json.loads(data)
+        memory.turns.extend(tuple(turn) for turn in state['turns'])
+        memory.summary = state['summary']
+        memory.last_standalone = state['last_standalone']
+        record = cls(session_id, memory)
+        record.last_doc_keys = tuple(state['last_doc_keys'])
+        return record
+
+
+class SessionStore:
+    """
+    Holds SessionRecords for many concurrent chats.
+
+    Records are kept in LRU order and evicted when there are more than
+    `max_sessions`, when their estimated total size passes `max_memory_bytes`,
+    or after `ttl_seconds` idle. With `spill_path` set, evicted sessions are
+    written to SQLite and transparently restored on the next request;
+    without it they are dropped. A record whose lock is held (a request is
+    running, see checkout()) is never evicted.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 1800,
+                 max_memory_bytes: int = 64 * 1024 * 1024, spill_path: Optional[str] = None,
+                 spill_retention_seconds: float = 7 * 24 * 3600, memory_factory=ConversationMemory):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_retention_seconds = spill_retention_seconds
+        self.memory_factory = memory_factory
+
+        self._records = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._last_expiry_check = time.time()
+        self.stats = {'created': 0, 'restored': 0, 'spilled': 0, 'dropped': 0}
+
+        self._db = None
+        if spill_path:
+            self._db = sqlite3.connect(spill_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, session_id: str) -> SessionRecord:
+        """Return the live record for a session, restoring it from spill or creating it"""
+        with self._lock:
+            self._maybe_expire()
+
+            record = self._records.get(session_id)
+            if record is not None:
+                self._records.move_to_end(session_id)
+            else:
+                record = self._restore(session_id)
+                if record is None:
+                    record = SessionRecord(session_id, self.memory_factory())
+                    self.stats['created'] += 1
+                self._records[session_id] = record
+                self._total_bytes += record.measure()
+
+            record.last_access = time.time()
+            self._evict(keep=record)
+            return record
+
+    @contextmanager
+    def checkout(self, session_id: str):
+        """
+        Yield the live record for a session with its lock held, so requests for
+        one session run in order and the record is not evicted while in use
+        """
+        while True:
+            record = self.get(session_id)
+            record.lock.acquire()
+            with self._lock:
+                if self._records.get(session_id) is record:
+                    break
+            # Evicted between get() and locking: take the live (or restored) one
+            record.lock.release()
+        try:
+            yield record
+        finally:
+            record.lock.release()
+
+    def update(self, record: SessionRecord) -> None:
+        """Re-measure a record after it changed (new turn, new embeddings)"""
+        with self._lock:
+            current = self._records.get(record.session_id)
+            if current is record:
+                self._total_bytes -= record.size_bytes
+                self._total_bytes += record.measure()
+                self._evict()
+            elif current is None:
+                # Evicted while it was being changed (used without checkout()): keep the new state
+                self._spill(record)
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            record = self._records.pop(session_id, None)
+            if record is not None:
+                self._total_bytes -= record.size_bytes
+            if self._db is not None:
+                self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self._db.commit()
+
+    def memory_usage(self) -> Dict:
+        with self._lock:
+            return {'sessions': len(self._records), 'bytes': self._total_bytes, **self.stats}
+
+    def _evict(self, keep: SessionRecord = None) -> None:
+        # Oldest first, skipping records in use; the store may stay over budget until they finish
+        in_use = []
+        while self._records and (len(self._records) > self.max_sessions
+                                 or self._total_bytes > self.max_memory_bytes):
+            session_id, record = self._records.popitem(last=False)
+            if record is keep or record.lock.locked():
+                in_use.append((session_id, record))
+                continue
+            self._release(record)
+        # Back in their LRU position
+        for session_id, record in reversed(in_use):
+            self._records[session_id] = record
+            self._records.move_to_end(session_id, last=False)
+
+    def _maybe_expire(self) -> None:
+        # Idle scan at most once per minute (or per TTL if shorter)
+        now = time.time()
+        if now - self._last_expiry_check < min(60.0, self.ttl_seconds):
+            return
+        self._last_expiry_check = now
+
+        while self._records:
+            session_id, record = next(iter(self._records.items()))
+            if now - record.last_access <= self.ttl_seconds:
+                break
+            if record.lock.locked():
+                # In use: expired after this request, if it stays idle
+                record.last_access = now
+                self._records.move_to_end(session_id)
+                continue
+            del self._records[session_id]
+            self._release(record)
+
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.spill_retention_seconds,))
+            self._db.commit()
+
+    def _release(self, record: SessionRecord) -> None:
+        self._total_bytes -= record.size_bytes
+        self._spill(record)
+
+    def _spill(self, record: SessionRecord) -> None:
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (record.session_id, record.to_json(), record.last_access)
+            )
+            self._db.commit()
+            self.stats['spilled'] += 1
+        else:
+            self.stats['dropped'] += 1
+
+    def _restore(self, session_id: str) -> Optional[SessionRecord]:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self._db.commit()
+        self.stats['restored'] += 1
+        return SessionRecord.from_json(session_id, row[0], self.memory_factory())
@@ -0,0 +1,187 @@
+from sqlalchemy import text
+from langchain_core.documents import Document
+from typing import List, Dict, Optional
+import time
+import re
+
+
+PRODUCT_LINES = ['milagro', 'utiliko', 'vivant']
+
+STATUS_WORDS = {
+    'on-hold': r"on[\s-]?hold|paused",
+    'completed': r"completed|finished|done",
+    'active': r"active|ongoing|in progress|running",
+}
+
+# Status words only count when they describe a project or its status ("completed projects",
+# "projects that are still running", "status: on hold"), not when they appear elsewhere in
+# the question ("what do I do when the sync is done running")
+STATUS_PHRASING = [
+    r"\b(?:{words})\s+(?:\w+\s+)?projects?\b",
+    r"\bprojects?\s+(?:(?:that|which)\s+)?(?:(?:is|are|was|were)\s+)?(?:(?:currently|still|now|already)\s+)?(?:{words})\b",
+    r"\bstatus\s*(?:(?:is|of)\s+|[:=]\s*)?(?:{words})\b",
+    r"\b(?:{words})\s+status\b",
+]
+
+STATUS_PATTERNS = {
+    status: "|".join(phrasing.format(words=words) for phrasing in STATUS_PHRASING)
+    for status, words in STATUS_WORDS.items()
+}
+
+DATE_VALUE = r"(\d{4}-\d{2}-\d{2}|\d{4}-\d{2}|\d{4})"
+
+TECH_TRIGGER = r"\b(?:using|uses|use|built with|written in|based on)\s+"
+# Never a technology, even if a tech_stack value happens to contain it
+TECH_STOP_WORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'for', 'with', 'in', 'on', 'it', 'this', 'that',
+    'my', 'our', 'your', 'any', 'some', 'other', 'project', 'projects', 'none', 'n/a',
+}
+
+
+class StructuredQueryEngine:
+    """
+    Answers exact project questions (status, start date, tech stack,
+    product line) with live, parameterized SQL instead of vector search.
+    """
+
+    def __init__(self, db_config, max_rows: int = 20, vocabulary_ttl: float = 300):
+        self.db_config = db_config
+        self.max_rows = max_rows
+        self.vocabulary_ttl = vocabulary_ttl
+        # (loaded_at, terms longest first) from the distinct tech_stack values
+        self._vocabulary = (0.0, [])
+
+    def tech_vocabulary(self) -> List[str]:
+        """Technologies named in projects.tech_stack (lowercase, longest first), reloaded every `vocabulary_ttl`s"""
+        loaded_at, terms = self._vocabulary
+        if time.time() - loaded_at < self.vocabulary_ttl:
+            return terms
+
+        with self.db_config.engine.connect() as conn:
+            rows = conn.execute(text("SELECT DISTINCT tech_stack FROM projects")).fetchall()
+        vocabulary = {
+            term.strip().lower()
+            for row in rows if row[0]
+            for term in re.split(r"[,;/|]", row[0])
+        }
+        terms = sorted((t for t in vocabulary if t and t not in TECH_STOP_WORDS), key=len, reverse=True)
+        self._vocabulary = (time.time(), terms)
+        return terms
+
+    def _match_tech(self, q: str) -> Optional[str]:
+        # Only a known technology right after "using"/"built with"/...: "use the dashboard" is not a filter
+        for trigger in re.finditer(TECH_TRIGGER, q):
+            rest = q[trigger.end():]
+            for term in self.tech_vocabulary():
+                if re.match(rf"{re.escape(term)}(?![\w+#])", rest):
+                    return term
+        return None
+
+    def detect_intent(self, query: str) -> Optional[Dict]:
+        """Extract structured filters from a question, or None if it is not a project lookup"""
+        q = query.lower()
+
+        if not re.search(r"\bprojects?\b", q):
+            return None
+
+        filters = {}
+
+        for status, pattern in STATUS_PATTERNS.items():
+            if re.search(pattern, q):
+                filters['status'] = status
+                break
+
+        after = re.search(r"\b(?:after|since|from)\s+" + DATE_VALUE, q)
+        before = re.search(r"\b(?:before|until|prior to)\s+" + DATE_VALUE, q)
+        during = re.search(r"\b(?:in|during)\s+(\d{4})\b", q)
+        if after:
+            filters['start_after'] = self._normalize_date(after.group(1))
+        if before:
+            filters['start_before'] = self._normalize_date(before.group(1))
+        if during and not (after or before):
+            filters['start_after'] = f"{during.group(1)}-01-01"
+            filters['start_before'] = f"{int(during.group(1)) + 1}-01-01"
+
+        tech = self._match_tech(q)
+        if tech:
+            filters['tech'] = tech
+
+        for product in PRODUCT_LINES:
+            if product in q:
+                filters['product'] = product
+                break
+
+        # A bare "projects" mention plus a product line is still a semantic question
+        if not any(key in filters for key in ('status', 'start_after', 'start_before', 'tech')):
+            return None
+
+        return filters
+
+    def _normalize_date(self, value: str) -> str:
+        if len(value) == 4:
+            return f"{value}-01-01"
+        if len(value) == 7:
+            return f"{value}-01"
+        return value
+
+    def build_query(self, filters: Dict):
+        """Build a parameterized SELECT for the given filters"""
+        conditions = []
+        params = {'limit': self.max_rows}
+
+        if 'status' in filters:
+            conditions.append("status = :status")
+            params['status'] = filters['status']
+        if 'start_after' in filters:
+            conditions.append("start_date >= :start_after")
+            params['start_after'] = filters['start_after']
+        if 'start_before' in filters:
+            conditions.append("start_date < :start_before")
+            params['start_before'] = filters['start_before']
+        if 'tech' in filters:
+            conditions.append("tech_stack LIKE :tech")
+            params['tech'] = f"%{filters['tech']}%"
+        if 'product' in filters:
+            conditions.append("project_name LIKE :product")
+            params['product'] = f"{filters['product']}%"
+
+        query = """
+        SELECT id, project_name, description, tech_stack,
+               status, DATE_FORMAT(start_date, '%Y-%m-%d') as start_date,
+               metadata
+        FROM projects
+        """
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY start_date DESC LIMIT :limit"
+
+        return query, params
+
+    def search(self, query: str) -> List[Document]:
+        """Run the structured lookup for a question; returns [] when no intent is detected"""
+        filters = self.detect_intent(query)
+        if not filters:
+            return []
+
+        sql, params = self.build_query(filters)
+
+        with self.db_config.engine.connect() as conn:
+            rows = conn.execute(text(sql), params).fetchall()
+
+        documents = []
+        for row in rows:
+            documents.append(Document(
+                page_content=f"Project: {row[1]}\nStatus: {row[4]}\nTech Stack: {row[3]}\n\nDescription: {row[2]}",
+                metadata={
+                    'id': row[0],
+                    'project_name': row[1],
+                    'tech_stack': row[3],
+                    'status': row[4],
+                    'start_date': row[5],
+                    'metadata': row[6] if row[6] else '{}',
+                    'source': 'projects',
+                    'structured': True
+                }
+            ))
+
+        return documents
@@ -0,0 +1,200 @@
+from contextlib import contextmanager
+from typing import Dict, Optional
+import threading
+import json
+import time
+import os
+
+
+# Latency buckets in seconds, from a cache hit up to a slow LLM generation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative histogram with one label, rendered in Prometheus text format"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float) -> None:
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                label = f'{self.label}="{label_value}"'
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound:g}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{label}}} {series["sum"]:.6f}')
+                lines.append(f'{self.name}_count{{{label}}} {series["count"]}')
+        return "\n".join(lines)
+
+
+class Counter:
+    """Monotonic counter with one label"""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def value(self, label_value: str) -> float:
+        return self._values.get(label_value, 0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_value, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value:g}')
+        return "\n".join(lines)
+
+
+class Gauge:
+    """Point-in-time value with one label"""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, label_value: str, value: float) -> None:
+        with self._lock:
+            self._values[label_value] = value
+
+    def value(self, label_value: str) -> float:
+        return self._values.get(label_value, 0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for label_value, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value:g}')
+        return "\n".join(lines)
+
+
+class RequestTrace:
+    """Per-request stage timings (seconds) plus free-form attributes"""
+
+    def __init__(self, question: str):
+        self.question = question
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.attributes = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        # A stage may run more than once per request (e.g. several searches)
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def timings_ms(self) -> Dict[str, float]:
+        return {stage: round(seconds * 1000, 2) for stage, seconds in self.timings.items()}
+
+
+class Telemetry:
+    """
+    Process-wide latency/token metrics for the answer pipeline.
+
+    Code on the request path wraps work in `telemetry.stage(name)`; the time
+    goes into the stage histogram and, if the thread has an active trace
+    (see start_trace/finish_trace), into that request's timings.
+    """
+
+    def __init__(self):
+        self.stage_latency = Histogram(
+            "chatbot_stage_duration_seconds", "Time spent per answer pipeline stage", "stage")
+        self.tokens = Counter(
+            "chatbot_llm_tokens_total", "Tokens reported by the LLM backend", "kind")
+        self.events = Counter(
+            "chatbot_events_total", "Pipeline events such as cache hits and budget cut-offs", "event")
+        self.index = Gauge(
+            "chatbot_vector_index", "Vector index state (live/dead vectors, dead ratio)", "measure")
+        self.trace_log_path = os.getenv('TRACE_LOG') or None
+        self._local = threading.local()
+        self._log_lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_latency.observe(name, elapsed)
+            trace = self.current_trace()
+            if trace is not None:
+                trace.add(name, elapsed)
+
+    def start_trace(self, question: str) -> RequestTrace:
+        trace = RequestTrace(question)
+        self._local.trace = trace
+        return trace
+
+    def current_trace(self) -> Optional[RequestTrace]:
+        return getattr(self._local, 'trace', None)
+
+    def finish_trace(self, trace: RequestTrace) -> Dict[str, float]:
+        """Close the trace, record the total and return timings in milliseconds"""
+        total = time.perf_counter() - trace.started
+        trace.timings['total'] = total
+        self.stage_latency.observe('total', total)
+        self._local.trace = None
+
+        if self.trace_log_path:
+            record = {
+                'ts': time.time(),
+                'question': trace.question,
+                'timings_ms': trace.timings_ms(),
+                **trace.attributes
+            }
+            with self._log_lock, open(self.trace_log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+        return trace.timings_ms()
+
+    def record_tokens(self, generation_info: Optional[Dict]) -> Dict[str, int]:
+        """Pull Ollama's prompt_eval_count/eval_count out of a generation's info dict"""
+        info = generation_info or {}
+        tokens = {
+            'prompt': int(info.get('prompt_eval_count') or 0),
+            'completion': int(info.get('eval_count') or 0),
+        }
+        self.tokens.inc('prompt', tokens['prompt'])
+        self.tokens.inc('completion', tokens['completion'])
+        return tokens
+
+    def render_prometheus(self) -> str:
+        return "\n".join([
+            self.stage_latency.render(), self.tokens.render(), self.events.render(), self.index.render()
+        ]) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write metrics for a node_exporter textfile collector (atomic replace)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+
+telemetry = Telemetry()
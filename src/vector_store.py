@@ -1,20 +1,76 @@
 from langchain_community.embeddings import HuggingFaceEmbeddings 
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_core.documents import Document
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+from contextlib import contextmanager
+import numpy as np
+import threading
+import hashlib
+import shutil
+import faiss
 import torch
+import json
+import time
+import uuid
+import sys
 import os
+from src.telemetry import telemetry
+from src.dim_reduction import DimensionReducer, ReducedEmbeddings, embed_queries
+from src.concurrency import ReadWriteLock, set_omp_threads
 
 
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+
+# DataLoader fields not kept in Document.metadata: article/project body text is
+# already in page_content, and the raw projects.metadata JSON is never read
+DROPPED_FIELDS = ('text', 'content', 'description', 'metadata')
+# Low-cardinality values repeated across documents are interned (stored once)
+INTERNED_FIELDS = ('source', 'category', 'status', 'created_date', 'start_date')
+
+
+def doc_key(metadata: Dict) -> str:
+    """Stable identity of a source row, e.g. 'knowledgebase:12'"""
+    return f"{metadata.get('source')}:{metadata.get('id')}"
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compact_metadata(doc: Dict) -> Dict:
+    """Metadata kept for an indexed document: no duplicated text, shared categorical strings"""
+    return {
+        k: sys.intern(v) if k in INTERNED_FIELDS and isinstance(v, str) else v
+        for k, v in doc.items() if k not in DROPPED_FIELDS
+    }
+
+
+def compact_docstore(store) -> None:
+    """Slim the metadata of documents loaded from a snapshot pickled before compaction"""
+    for doc in store.docstore._dict.values():
+        doc.metadata = compact_metadata(doc.metadata)
+
+
+def to_document(doc: Dict) -> Document:
+    """Convert a DataLoader dict into a LangChain Document"""
+    return Document(page_content=doc['text'], metadata=compact_metadata(doc))
 
 
 class VectorStoreManager:
-    def __init__(self, embedding_model: str):
+    def __init__(self, embedding_model: str, embeddings=None, reducer: DimensionReducer = None):
         print(f"Initializing embeddings model: {embedding_model}")
 
         device = "cuda" if torch.cuda.is_available() else "cpu"
 
-        self.embeddings = HuggingFaceEmbeddings(
+        # An explicit Embeddings instance (e.g. benchmark hashing embeddings) skips model loading
+        self.base_embeddings = embeddings or HuggingFaceEmbeddings(
             model_name=embedding_model,
             model_kwargs={
                 "device": device,
@@ -24,9 +80,42 @@ class VectorStoreManager:
                 "normalize_embeddings": True
             }
         )
+        self.embedding_model = embedding_model
+        # Optional PCA / Matryoshka truncation applied to every document and query vector
+        self.reducer = reducer
+        self.embeddings = ReducedEmbeddings(self.base_embeddings, reducer) if reducer else self.base_embeddings
+        # Bumped whenever the live embedding function changes (e.g. a snapshot with a new PCA
+        # basis), so query vectors cached by callers can be invalidated
+        self.embedding_version = 0
 
         self.vector_store = None
+        # Snapshots live in <persist_directory>/snapshots/<version>, CURRENT names the published one
         self.persist_directory = "vector_db"
+        self.snapshot_version = None
+        self.snapshot_retention = 5
+        self._rejected_version = None
+        # (store, {row key: FAISS position}) - kept current by every writer
+        self._key_map = (None, {})
+        # (store, bitmap of live FAISS positions) - searches skip tombstoned vectors with it
+        self._live_bits = (None, None)
+        # Serializes writers (in-place updates, compaction, swaps, saves); searches never
+        # take it. Re-entrant so swap listeners may read the store through frozen()
+        self._write_lock = threading.RLock()
+        # Searches hold the read side; store swaps and in-place index changes
+        # (row updates, search params) take the write side, so no search sees them half-done
+        self._rw = ReadWriteLock()
+        # FAISS OpenMP threads per search call: 1 suits many concurrent single-query
+        # requests (no oversubscription), batch searches can use every core (0)
+        self.search_threads = 1
+        self.batch_search_threads = 0
+        # Newest source-row updated_at covered by the index (see IndexSyncWorker)
+        self.source_watermark = None
+        # Optional extractive.SentenceIndex kept in step with the FAISS index
+        self.sentence_index = None
+        # Called as listener(changed_keys) after each swap of the live store;
+        # changed_keys is the set of upserted/deleted row keys, or None when
+        # the whole index was replaced (snapshot load / hot reload)
+        self.swap_listeners = []
     
     def create_vector_store(self, documents: List[Dict]) -> None:
         """
@@ -44,10 +133,7 @@ class VectorStoreManager:
                 # Comment: Tickets are intentionally excluded
                 continue
             
-            langchain_doc = Document(
-                page_content=doc['text'],
-                metadata={k: v for k, v in doc.items() if k != 'text'}
-            )
+            langchain_doc = to_document(doc)
 
             # langchain_doc = Document(
             #     page_content=doc['text'],
@@ -60,56 +146,625 @@ class VectorStoreManager:
 
             langchain_docs.append(langchain_doc)
         
-        # Create FAISS vector store
-        self.vector_store = FAISS.from_documents(
-            langchain_docs,
-            self.embeddings
-        )
+        # Create FAISS vector store (docstore ids are the row keys)
+        if self.reducer:
+            # Embed once at full size; PCA is (re)fitted on this corpus, then every vector is reduced
+            texts = [doc.page_content for doc in langchain_docs]
+            full = np.asarray(self.base_embeddings.embed_documents(texts), dtype=np.float32)
+            self.reducer.fit(full)
+            self.vector_store = FAISS.from_embeddings(
+                list(zip(texts, self.reducer.transform(full).tolist())),
+                self.embeddings,
+                metadatas=[doc.metadata for doc in langchain_docs],
+                ids=[doc_key(doc.metadata) for doc in langchain_docs]
+            )
+            print(f"✓ Embeddings reduced {full.shape[1]} → {self.reducer.output_dim} dims ({self.reducer.method})")
+        else:
+            self.vector_store = FAISS.from_documents(
+                langchain_docs,
+                self.embeddings,
+                ids=[doc_key(doc.metadata) for doc in langchain_docs]
+            )
         
         print(f"✓ Vector store created with {len(langchain_docs)} documents (tickets excluded)")
+        self._record_index_state(self.vector_store)
+
+        if self.sentence_index is not None:
+            self.sentence_index.build([doc for doc in documents if doc.get("type") != "ticket"])
     
-    def save_vector_store(self) -> None:
-        """Save vector store to disk"""
-        if self.vector_store:
-            os.makedirs(self.persist_directory, exist_ok=True)
-            self.vector_store.save_local(self.persist_directory)
-            print(f"✓ Vector store saved to {self.persist_directory}")
-    
+    def save_vector_store(self) -> Optional[str]:
+        """
+        Save the index as a new immutable snapshot and publish it.
+        Files are written to a temporary directory that is renamed to
+        snapshots/<version> once complete (with a manifest of embedding
+        model, doc count, watermark and checksums); then the CURRENT pointer
+        is replaced atomically and snapshots beyond `snapshot_retention` are
+        removed. Returns the published version.
+        """
+        if not self.vector_store:
+            return None
+
+        root = os.path.join(self.persist_directory, "snapshots")
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        tmp_dir = os.path.join(root, f".tmp-{version}")
+        os.makedirs(tmp_dir)
+
+        # Rows are updated in place, so hold off writers while the files are written
+        with self.frozen() as store:
+            store.save_local(tmp_dir)
+            if self.sentence_index is not None:
+                self.sentence_index.save(tmp_dir)
+            if self.reducer is not None:
+                self.reducer.save(tmp_dir)
+            doc_count = len(self._positions(store))
+            source_watermark = self.source_watermark
+
+        manifest = {
+            "version": version,
+            "created_at": time.time(),
+            "embedding_model": self.embedding_model,
+            "reduction": self.reducer.describe() if self.reducer else None,
+            "doc_count": doc_count,
+            "source_watermark": source_watermark,
+            "files": {name: file_checksum(os.path.join(tmp_dir, name)) for name in sorted(os.listdir(tmp_dir))},
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        os.rename(tmp_dir, os.path.join(root, version))
+        self._publish(version)
+        self.snapshot_version = version
+        self._prune_snapshots()
+        print(f"✓ Vector store snapshot {version} published to {self.persist_directory}")
+        return version
+
+    def _publish(self, version: str) -> None:
+        """Point CURRENT at a snapshot (write + fsync + rename, so readers see old or new)"""
+        pointer = os.path.join(self.persist_directory, CURRENT_FILE)
+        with open(f"{pointer}.tmp", "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{pointer}.tmp", pointer)
+
+    def _published_version(self) -> Optional[str]:
+        pointer = os.path.join(self.persist_directory, CURRENT_FILE)
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            return f.read().strip() or None
+
+    def _prune_snapshots(self) -> None:
+        root = os.path.join(self.persist_directory, "snapshots")
+        versions = sorted(name for name in os.listdir(root) if not name.startswith("."))
+        current = self._published_version()
+        for version in versions[:-self.snapshot_retention]:
+            if version != current:
+                shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+    def _read_snapshot(self, version: str):
+        """
+        Load and verify a snapshot without touching the live index.
+        Returns (store, manifest, sentence entries), or None if it was built with another
+        embedding model or its files do not match the manifest checksums.
+        """
+        directory = os.path.join(self.persist_directory, "snapshots", version)
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+
+        if manifest.get("embedding_model") != self.embedding_model:
+            print(f"✗ Snapshot {version} was built with {manifest.get('embedding_model')}, "
+                  f"not {self.embedding_model}; rebuild with --reload")
+            return None
+
+        wanted = self.reducer.describe() if self.reducer else None
+        if manifest.get("reduction") != wanted:
+            print(f"✗ Snapshot {version} uses reduction {manifest.get('reduction')}, "
+                  f"not {wanted}; rebuild with --reload")
+            return None
+
+        for name, checksum in manifest["files"].items():
+            if file_checksum(os.path.join(directory, name)) != checksum:
+                print(f"✗ Snapshot {version} is corrupt ({name} checksum mismatch)")
+                return None
+
+        # Each snapshot carries its own fitted PCA; it becomes live together with the store
+        embeddings = self.base_embeddings
+        if self.reducer:
+            reducer = DimensionReducer(self.reducer.method, self.reducer.dim)
+            if not reducer.load(directory):
+                print(f"✗ Snapshot {version} is missing its PCA matrix; rebuild with --reload")
+                return None
+            embeddings = ReducedEmbeddings(self.base_embeddings, reducer)
+
+        store = FAISS.load_local(directory, embeddings, allow_dangerous_deserialization=True)
+        sentences = self._read_sentences(directory, store)
+        compact_docstore(store)
+        return store, manifest, sentences
+
+    def _use_store(self, store, sentences: Optional[Dict] = None) -> None:
+        """
+        Make a loaded store live, along with the embedding function (PCA) it
+        was built with and its sentence index entries
+        """
+        self._positions(store)
+        with self._rw.write():
+            if sentences is not None and self.sentence_index is not None:
+                self.sentence_index.use(sentences)
+            if self.reducer:
+                self.reducer = store.embedding_function.reducer
+            if store.embedding_function is not self.embeddings:
+                self.embedding_version += 1
+            self.embeddings = store.embedding_function
+            self.vector_store = store
+
+    def _notify_swap(self, changed_keys: Optional[set]) -> None:
+        for listener in self.swap_listeners:
+            try:
+                listener(changed_keys)
+            except Exception as e:
+                print(f"✗ Index swap listener failed: {e}")
+
+    def _read_sentences(self, directory: str, store) -> Optional[Dict]:
+        """Sentence entries for a store being loaded; the live sentence index is not touched"""
+        if self.sentence_index is None:
+            return None
+        entries = self.sentence_index.read(directory)
+        if entries is None:
+            # Indexes saved before sentence embeddings existed are backfilled from the docstore,
+            # with the store's own embedding function (its PCA basis)
+            entries = self.sentence_index.embed_documents(
+                [{**doc.metadata, 'text': doc.page_content} for doc in store.docstore._dict.values()],
+                embed_texts=lambda texts: np.asarray(store.embedding_function.embed_documents(texts), dtype=np.float32)
+            )
+            print(f"✓ Sentence index backfilled for {len(entries)} FAQ/SOP articles")
+        return entries
+
     def load_vector_store(self) -> bool:
-        """Load vector store from disk"""
+        """Load the published snapshot (or a legacy unversioned vector_db/) from disk"""
         try:
-            if os.path.exists(self.persist_directory):
-                self.vector_store = FAISS.load_local(
-                    self.persist_directory,
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
-                )
-                print(f"✓ Vector store loaded from {self.persist_directory}")
-                return True
-            return False
+            version = self._published_version()
+            if version is None:
+                return self._load_legacy()
+
+            loaded = self._read_snapshot(version)
+            if loaded is None:
+                return False
+            store, manifest, sentences = loaded
+            self._use_store(store, sentences)
+            self._notify_swap(None)
+            self.source_watermark = manifest.get("source_watermark")
+            self.snapshot_version = version
+            self._record_index_state(self.vector_store)
+            print(f"✓ Vector store snapshot {version} loaded ({manifest['doc_count']} documents)")
+            return True
         except Exception as e:
             print(f"✗ Failed to load vector store: {e}")
             return False
+
+    def _load_legacy(self) -> bool:
+        if not os.path.exists(os.path.join(self.persist_directory, "index.faiss")):
+            return False
+        if self.reducer:
+            print("✗ Unversioned vector store has no dimensionality reduction; rebuild with --reload")
+            return False
+        self.vector_store = FAISS.load_local(
+            self.persist_directory,
+            self.embeddings,
+            allow_dangerous_deserialization=True
+        )
+        print(f"✓ Vector store loaded from {self.persist_directory} "
+              f"(unversioned; embedding model not recorded, save again to create a snapshot)")
+        self._rekey_legacy(self.vector_store)
+
+        state_path = os.path.join(self.persist_directory, "sync_state.json")
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                self.source_watermark = json.load(f).get("source_watermark")
+        sentences = self._read_sentences(self.persist_directory, self.vector_store)
+        if sentences is not None:
+            self.sentence_index.use(sentences)
+        compact_docstore(self.vector_store)
+        return True
+
+    @staticmethod
+    def _rekey_legacy(store) -> None:
+        """
+        Stores built before docstore ids were row keys use random uuids; re-key
+        them once (no re-embedding) so updates and deletes can address rows.
+        Older duplicates of a row are tombstoned.
+        """
+        if all(docstore_id == doc_key(store.docstore.search(docstore_id).metadata)
+               for docstore_id in store.index_to_docstore_id.values()):
+            return
+        docstore, mapping, seen = {}, {}, {}
+        for position, docstore_id in sorted(store.index_to_docstore_id.items()):
+            doc = store.docstore.search(docstore_id)
+            key = doc_key(doc.metadata)
+            mapping.pop(seen.get(key), None)
+            seen[key] = position
+            mapping[position] = key
+            docstore[key] = doc
+        store.docstore = InMemoryDocstore(docstore)
+        store.index_to_docstore_id = mapping
+        print(f"✓ Re-keyed unversioned vector store by row ({len(mapping)} rows)")
+
+    def reload_if_changed(self) -> bool:
+        """
+        Hot-swap in a snapshot published by another process (e.g. a rebuild).
+        The new index is loaded and verified first; in-flight searches keep
+        the store reference they already hold, so no request is dropped.
+        """
+        version = self._published_version()
+        if version is None or version in (self.snapshot_version, self._rejected_version):
+            return False
+
+        loaded = self._read_snapshot(version)
+        if loaded is None:
+            # Don't retry a rejected snapshot on every poll
+            self._rejected_version = version
+            return False
+
+        store, manifest, sentences = loaded
+        with self._write_lock:
+            self._use_store(store, sentences)
+            self.source_watermark = manifest.get("source_watermark")
+            self.snapshot_version = version
+        # Outside the writer lock: listeners may take their own locks, then frozen()
+        self._notify_swap(None)
+        print(f"✓ Hot-reloaded vector store snapshot {version}")
+        return True
     
-    def similarity_search(self, query: str, k: int = 5, filter_dict: Dict = None) -> List[Document]:
+    def similarity_search(self, query: str, k: int = 5, filter_dict: Dict = None,
+                          query_vector=None) -> List[Document]:
         """
         Search for similar documents.
         This will NEVER return ticket documents because they are not stored.
+        Pass `query_vector` to reuse an embedding computed earlier.
+        """
+        return [doc for doc, _ in self.similarity_search_with_scores(query, k, filter_dict, query_vector)]
+
+    def similarity_search_with_scores(self, query: str, k: int = 5, filter_dict: Dict = None,
+                                      query_vector=None, subset_keys=None) -> List[Tuple[Document, float]]:
+        """
+        Like similarity_search, but each document comes with its cosine
+        similarity to the query (1.0 = identical, ~0 = unrelated).
+        `subset_keys` restricts the search to those rows (FAISS IDSelector),
+        so only their vectors are scored.
         """
         if not self.vector_store:
             raise ValueError("Vector store not initialized")
+
+        with telemetry.stage('similarity_search'):
+            # Embed with the function the searched store was built with (its PCA basis)
+            embedding = None
+            if query_vector is None:
+                embedding = self.vector_store.embedding_function
+                with telemetry.stage('query_embedding'):
+                    query_vector = embedding.embed_query(query)
+            set_omp_threads(self.search_threads)
+            # The live store is read under the lock: once a swap returns, no search uses the old one
+            with telemetry.stage('faiss_search'), self._rw.read():
+                store = self.vector_store
+                if embedding is not None and store.embedding_function is not embedding:
+                    # Swapped to a differently reduced index while embedding
+                    query_vector = store.embedding_function.embed_query(query)
+                subset = None
+                if subset_keys is not None:
+                    positions = self._positions(store)
+                    subset = [positions[key] for key in subset_keys if key in positions]
+                results = self._search(store, [query_vector], k, filter_dict, subset, self._live_bitmap(store))[0]
         
-        if filter_dict:
-            results = self.vector_store.similarity_search(
-                query,
-                k=k,
-                filter=filter_dict
-            )
+        return [(doc, self._to_similarity(store, score)) for doc, score in results]
+
+    def similarity_search_batch(self, queries: List[str], k: int = 5, filter_dict: Dict = None,
+                                query_vectors=None) -> List[List[Tuple[Document, float]]]:
+        """
+        Search many queries at once: one embedding forward pass for all of them
+        (embed_queries, so each vector matches what embed_query gives) and a
+        single FAISS matrix search (using `batch_search_threads` OpenMP
+        threads). Returns, per query, (document, cosine similarity) pairs as
+        similarity_search_with_scores would.
+        """
+        if not self.vector_store:
+            raise ValueError("Vector store not initialized")
+        if not queries and query_vectors is None:
+            return []
+
+        with telemetry.stage('similarity_search_batch'):
+            embedding = None
+            if query_vectors is None:
+                embedding = self.vector_store.embedding_function
+                with telemetry.stage('query_embedding'):
+                    query_vectors = embed_queries(embedding, list(queries))
+            set_omp_threads(self.batch_search_threads)
+            with telemetry.stage('faiss_search'), self._rw.read():
+                store = self.vector_store
+                if embedding is not None and store.embedding_function is not embedding:
+                    query_vectors = embed_queries(store.embedding_function, list(queries))
+                batches = self._search(store, query_vectors, k, filter_dict, live_bits=self._live_bitmap(store))
+
+        return [[(doc, self._to_similarity(store, score)) for doc, score in results] for results in batches]
+
+    @staticmethod
+    def _search(store, query_vectors, k: int, filter_dict: Dict = None,
+                subset: List[int] = None, live_bits: np.ndarray = None) -> List[List[Tuple[Document, float]]]:
+        """
+        Raw FAISS search of a matrix of query vectors (one result list per row)
+        that skips tombstoned positions (positions with no entry in
+        index_to_docstore_id, see apply_changes): FAISS only scores positions
+        set in `live_bits` (IDSelectorBitmap), so no over-fetch is needed for
+        them. Over-fetches when a metadata filter is applied.
+        With `subset` (live positions) only those vectors are searched.
+        """
+        if len(query_vectors) == 0:
+            return []
+        vectors = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+        ntotal = store.index.ntotal
+        if ntotal == 0 or subset == []:
+            return [[] for _ in range(len(vectors))]
+
+        if store._normalize_L2:
+            vectors = np.ascontiguousarray(vectors)
+            faiss.normalize_L2(vectors)
+
+        selector = None
+        if subset is not None:
+            fetch_k = min(len(subset), k * (4 if filter_dict else 1))
+            selector = faiss.IDSelectorBatch(np.asarray(subset, dtype=np.int64))
         else:
-            results = self.vector_store.similarity_search(query, k=k)
-        
-        return results
+            fetch_k = min(ntotal, k * (4 if filter_dict else 1))
+            if live_bits is not None and len(store.index_to_docstore_id) < ntotal:
+                # live_bits must outlive the search (the selector only points at it)
+                selector = faiss.IDSelectorBitmap(len(live_bits), faiss.swig_ptr(live_bits))
+
+        if selector is None:
+            scores, positions = store.index.search(vectors, fetch_k)
+        else:
+            if hasattr(store.index, 'nprobe'):
+                params = faiss.SearchParametersIVF(sel=selector, nprobe=store.index.nprobe)
+            else:
+                params = faiss.SearchParameters(sel=selector)
+            scores, positions = store.index.search(vectors, fetch_k, params=params)
+
+        batches = []
+        for row_scores, row_positions in zip(scores, positions):
+            results = []
+            for score, position in zip(row_scores, row_positions):
+                docstore_id = store.index_to_docstore_id.get(int(position))
+                if docstore_id is None:
+                    continue
+                doc = store.docstore.search(docstore_id)
+                if filter_dict and any(doc.metadata.get(key) != value for key, value in filter_dict.items()):
+                    continue
+                results.append((doc, float(score)))
+                if len(results) == k:
+                    break
+            batches.append(results)
+        return batches
+
+    @staticmethod
+    def _to_similarity(store, score: float) -> float:
+        # Embeddings are L2-normalized, so squared L2 distance d maps to cosine 1 - d/2
+        if store.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+            return float(score)
+        return 1.0 - float(score) / 2.0
+
+    def _live_bitmap(self, store) -> np.ndarray:
+        """Bit i set iff FAISS position i is live (cached per store, kept current by apply_changes)"""
+        cached_store, bits = self._live_bits
+        if cached_store is not store:
+            live = np.zeros(store.index.ntotal, dtype=bool)
+            live[np.fromiter(store.index_to_docstore_id.keys(), dtype=np.int64)] = True
+            bits = np.packbits(live, bitorder='little')
+            self._live_bits = (store, bits)
+        return bits
     
+    def _positions(self, store) -> Dict[str, int]:
+        """Map source row keys to FAISS vector positions for the given store (cached per store)"""
+        cached_store, positions = self._key_map
+        if cached_store is not store:
+            positions = {}
+            for position, docstore_id in store.index_to_docstore_id.items():
+                doc = store.docstore.search(docstore_id)
+                if isinstance(doc, Document):
+                    positions[doc_key(doc.metadata)] = position
+            self._key_map = (store, positions)
+        return positions
+
+    @contextmanager
+    def frozen(self):
+        """
+        Hold off index writers (not searches) and yield the live store, for
+        whole-index scans such as building routing tables. Don't search from
+        inside: a waiting swap would block the read lock.
+        """
+        with self._write_lock:
+            yield self.vector_store
+
+    def live_documents(self) -> List[Document]:
+        """Documents of every live (non-tombstoned) vector, e.g. for building routing dictionaries"""
+        with self.frozen() as store:
+            return [store.docstore.search(docstore_id) for docstore_id in store.index_to_docstore_id.values()]
+
+    def variant_groups(self) -> Dict[str, List[str]]:
+        """Canonical key -> keys of the near-duplicate rows folded into it (see NearDuplicateDetector)"""
+        with self.frozen() as store:
+            return {key: list(doc.metadata['variants'])
+                    for key, doc in store.docstore._dict.items() if doc.metadata.get('variants')}
+
+    def indexed_keys(self) -> set:
+        """Row keys currently present in the index"""
+        with self._rw.read():
+            return set(self._positions(self.vector_store))
+
+    def apply_changes(self, upserts: List[Dict], deleted_keys: List[str]) -> None:
+        """
+        Apply row inserts/updates (DataLoader dicts) and deletes to the index.
+        The live index is updated in place (cost proportional to the change,
+        not the index) under the write side of the read/write lock, so
+        concurrent searches never see a half-updated index.
+
+        Replaced and deleted vectors are not removed from FAISS (remove_ids
+        renumbers every later position in flat indexes and is unsupported by
+        HNSW); their positions are tombstoned by dropping them from
+        index_to_docstore_id, skipped at query time and reclaimed by compact().
+        """
+        if not self.vector_store:
+            raise ValueError("Vector store not initialized")
+
+        # Last version of each row wins if a row appears twice in one batch
+        docs = list({doc_key(doc.metadata): doc for doc in map(to_document, upserts)}.values())
+        # Embed outside the lock; this is the slow part
+        vectors = self.embed_texts([doc.page_content for doc in docs]) if docs else []
+
+        with self._write_lock:
+            store = self.vector_store
+            matrix = np.asarray(vectors, dtype=np.float32)
+            if docs and store._normalize_L2:
+                faiss.normalize_L2(matrix)
+            positions = self._positions(store)
+            bits = self._live_bitmap(store)
+
+            with self._rw.write():
+                # Tombstone old versions and drop their documents
+                for key in [doc_key(doc.metadata) for doc in docs] + list(deleted_keys):
+                    position = positions.pop(key, None)
+                    if position is not None:
+                        store.docstore._dict.pop(store.index_to_docstore_id.pop(position, None), None)
+                        bits[position >> 3] &= np.uint8(~(1 << (position & 7)) & 0xFF)
+
+                if docs:
+                    start = store.index.ntotal
+                    store.index.add(matrix)
+                    bits = np.concatenate([bits, np.zeros((store.index.ntotal + 7) // 8 - len(bits), dtype=np.uint8)])
+                    for offset, doc in enumerate(docs):
+                        key = doc_key(doc.metadata)
+                        store.docstore._dict[key] = doc
+                        store.index_to_docstore_id[start + offset] = key
+                        positions[key] = start + offset
+                        bits[(start + offset) >> 3] |= np.uint8(1 << ((start + offset) & 7))
+                # A search may have cached its own maps of the pre-change state meanwhile
+                self._key_map = (store, positions)
+                self._live_bits = (store, bits)
+            self._record_index_state(store)
+
+        if self.sentence_index is not None:
+            self.sentence_index.apply_changes(upserts, deleted_keys)
+        self._notify_swap({doc_key(doc.metadata) for doc in docs} | set(deleted_keys))
+
+    def dead_ratio(self, store=None) -> float:
+        """Share of FAISS vectors that are tombstoned"""
+        store = self.vector_store if store is None else store
+        ntotal = store.index.ntotal
+        return (ntotal - len(store.index_to_docstore_id)) / ntotal if ntotal else 0.0
+
+    def _record_index_state(self, store) -> None:
+        live = len(store.index_to_docstore_id)
+        telemetry.index.set('live_vectors', live)
+        telemetry.index.set('dead_vectors', store.index.ntotal - live)
+        telemetry.index.set('dead_ratio', self.dead_ratio(store))
+
+    def compact(self, min_dead_ratio: float = 0.0) -> bool:
+        """
+        Rebuild the FAISS index from live vectors only (reconstructed, not
+        re-embedded) when the dead ratio is above `min_dead_ratio`. The copy
+        is built holding off other writers (searches continue on the live
+        index) and then swapped in.
+        """
+        with self._write_lock:
+            store = self.vector_store
+            if not store or self.dead_ratio(store) <= min_dead_ratio:
+                return False
+
+            live = sorted(store.index_to_docstore_id.items())
+            index = faiss.clone_index(store.index)
+            index.reset()
+            if live:
+                index.add(np.vstack([store.index.reconstruct(int(position)) for position, _ in live]))
+
+            # Only documents still referenced by a live vector survive
+            compacted = FAISS(
+                embedding_function=store.embedding_function,
+                index=index,
+                docstore=InMemoryDocstore({docstore_id: store.docstore._dict[docstore_id] for _, docstore_id in live}),
+                index_to_docstore_id={i: docstore_id for i, (_, docstore_id) in enumerate(live)},
+                normalize_L2=store._normalize_L2,
+                distance_strategy=store.distance_strategy
+            )
+
+            dead = store.index.ntotal - len(live)
+            self._positions(compacted)
+            with self._rw.write():
+                self.vector_store = compacted
+            self._record_index_state(compacted)
+        # Same rows and content, only vector positions changed
+        self._notify_swap(set())
+
+        telemetry.events.inc('index_compaction')
+        print(f"✓ Index compacted: {dead} dead vectors removed, {len(live)} live")
+        return True
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a query with the same model used for the index"""
+        return np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed several queries in one forward pass (rows match embed_query)"""
+        return np.asarray(embed_queries(self.embeddings, queries), dtype=np.float32)
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed several passages in one forward pass"""
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def get_vectors(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Return the stored embedding for each key that is in the index,
+        so callers can score candidates without re-embedding them.
+        """
+        if not self.vector_store:
+            raise ValueError("Vector store not initialized")
+
+        vectors = {}
+        with self._rw.read():
+            store = self.vector_store
+            positions = self._positions(store)
+            for key in keys:
+                position = positions.get(key)
+                if position is not None:
+                    vectors[key] = store.index.reconstruct(int(position))
+        return vectors
+
+    def get_document(self, key: str) -> Optional[Document]:
+        """Look up the indexed Document for a source row key"""
+        with self._rw.read():
+            store = self.vector_store
+            position = self._positions(store).get(key)
+            if position is None:
+                return None
+            return store.docstore.search(store.index_to_docstore_id[position])
+
+    def set_search_params(self, **params) -> Dict[str, bool]:
+        """
+        Set FAISS search-time parameters such as nprobe (IVF) or efSearch (HNSW).
+        Returns which parameters the current index type accepted; a flat index
+        accepts none, since exact search has nothing to tune.
+        """
+        if not self.vector_store:
+            raise ValueError("Vector store not initialized")
+
+        space = faiss.ParameterSpace()
+        applied = {}
+        # Changes the live index in place, so wait for in-flight searches
+        with self._rw.write():
+            for name, value in params.items():
+                try:
+                    space.set_index_parameter(self.vector_store.index, name, value)
+                    applied[name] = True
+                except RuntimeError:
+                    applied[name] = False
+        return applied
+
     def get_retriever(self, k: int = 5):
         """
         Get a retriever object for the vector store.
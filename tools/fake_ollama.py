@@ -0,0 +1,97 @@
+"""
+Minimal fake Ollama server for exercising LLM routing offline.
+
+    python -m tools.fake_ollama --port 11501 --latency-ms 800 --models qwen3,tinyllama
+    python -m tools.fake_ollama --port 11502 --latency-ms 200 --fail-rate 0.2
+
+Implements GET /api/tags and POST /api/generate (streaming NDJSON or a
+single JSON object), which is all OllamaLLM and the pool's health checks use.
+Responses name the server port so you can see where each request was routed.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timezone
+import argparse
+import random
+import json
+import time
+
+
+def make_handler(args):
+    class FakeOllamaHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *log_args):
+            if args.verbose:
+                super().log_message(format, *log_args)
+
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json(200, {"models": [{"name": name, "model": name} for name in args.models]})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = request.get("model", "")
+            if model not in args.models and model.split(":")[0] not in args.models:
+                self._send_json(404, {"error": f"model '{model}' not found"})
+                return
+            if random.random() < args.fail_rate:
+                self._send_json(500, {"error": "injected failure"})
+                return
+
+            time.sleep(args.latency_ms / 1000)
+            prompt = request.get("prompt", "")
+            words = f"Fake answer from port {args.port} using {model}.".split()
+            created_at = datetime.now(timezone.utc).isoformat()
+            final = {
+                "model": model, "created_at": created_at, "response": "", "done": True, "done_reason": "stop",
+                "prompt_eval_count": len(prompt.split()), "eval_count": len(words),
+                "total_duration": int(args.latency_ms * 1e6),
+            }
+
+            if request.get("stream", True):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for word in words:
+                    chunk = {"model": model, "created_at": created_at, "response": word + " ", "done": False}
+                    self.wfile.write((json.dumps(chunk) + "\n").encode())
+                self.wfile.write((json.dumps(final) + "\n").encode())
+            else:
+                self._send_json(200, {**final, "response": " ".join(words)})
+
+    return FakeOllamaHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11501)
+    parser.add_argument("--models", default="llama3.1,qwen3,mistral,phi3,tinyllama",
+                        type=lambda value: value.split(","))
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of generations answered with HTTP 500")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"✓ Fake Ollama listening on http://{args.host}:{args.port} (models: {', '.join(args.models)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
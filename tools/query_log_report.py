@@ -0,0 +1,101 @@
+"""
+Aggregate the query log into top questions and latency percentiles.
+
+    python -m tools.query_log_report logs/queries
+    python -m tools.query_log_report logs/queries --top 50 --since-hours 24 --json
+
+Accepts a QueryLog directory or a single JSONL(.gz) file (e.g. TRACE_LOG).
+Background records (precompute refreshes) are excluded.
+"""
+from collections import Counter, defaultdict
+import argparse
+import json
+import math
+import time
+from src.query_log import read_records
+from src.precomputed import normalize_question
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def aggregate(records, top: int = 20) -> dict:
+    questions = Counter()
+    models = Counter()
+    routing = Counter()
+    stage_samples = defaultdict(list)
+    total = 0
+
+    for record in records:
+        if record.get('background'):
+            continue
+        total += 1
+        questions[normalize_question(record.get('standalone') or record.get('question') or '')] += 1
+        models[record.get('model') or 'none'] += 1
+        # "extractive (Reset guide)" -> "extractive"
+        routing[(record.get('routing') or 'llm').split(' (')[0]] += 1
+        for stage, ms in (record.get('timings_ms') or {}).items():
+            stage_samples[stage].append(ms)
+
+    latency = {}
+    for stage, samples in sorted(stage_samples.items()):
+        samples.sort()
+        latency[stage] = {
+            'count': len(samples),
+            'p50_ms': round(percentile(samples, 50), 1),
+            'p90_ms': round(percentile(samples, 90), 1),
+            'p99_ms': round(percentile(samples, 99), 1),
+            'max_ms': round(samples[-1], 1),
+        }
+
+    return {
+        'requests': total,
+        'distinct_questions': len(questions),
+        'top_questions': questions.most_common(top),
+        'top_share': round(sum(c for _, c in questions.most_common(top)) / total, 3) if total else 0.0,
+        'models': dict(models),
+        'routing': dict(routing),
+        'latency': latency,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"Requests: {report['requests']}  Distinct questions: {report['distinct_questions']}  "
+          f"Top-{len(report['top_questions'])} share: {report['top_share']:.1%}")
+
+    print("\nTop questions:")
+    for question, count in report['top_questions']:
+        print(f"  {count:6d}  {question}")
+
+    print("\nModels:  " + ", ".join(f"{m}={c}" for m, c in report['models'].items()))
+    print("Routing: " + ", ".join(f"{r}={c}" for r, c in report['routing'].items()))
+
+    print(f"\n{'stage':<20}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, s in report['latency'].items():
+        print(f"{stage:<20}{s['count']:>8}{s['p50_ms']:>10}{s['p90_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query log report")
+    parser.add_argument("path", nargs="?", default="logs/queries", help="QueryLog directory or JSONL(.gz) file")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--since-hours", type=float, default=None)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    since = time.time() - args.since_hours * 3600 if args.since_hours else None
+    report = aggregate(read_records(args.path, since=since), top=args.top)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()